@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+Shared Plotly look for the dashboard and figure payload slimming.
+
+Every chart uses the small registered "dashboard" template instead of repeating the
+same white-background layout, and goes through slim_figure() before it is sent to
+the browser. slim_figure() drops layout values the template already provides and
+downcasts numeric arrays. Plotly >= 6 then ships those arrays base64-encoded
+instead of as JSON number lists. figure_bytes() measures the result so each chart
+can be held to a byte budget (see check_budget).
+
+For lite mode render_static() turns a slimmed figure into a static image with
+kaleido (optional; see static_rendering_available), so the page needs no plotly.js.
+The default state of every chart is rendered once per store build (see
+figures.render_default_snapshots) and matched to a page's figure by figure_digest().
+"""
+import copy
+import hashlib
+import importlib.util
+import io
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+from PIL import Image
+
+TEMPLATE_NAME = "dashboard"
+
+# Serialized payload budgets in bytes, per chart name (DEFAULT_FIGURE_BUDGET otherwise)
+DEFAULT_FIGURE_BUDGET = 8_000
+FIGURE_BUDGETS = {
+    "population_trend": 10_000,
+    "cost_explore": 60_000,
+}
+
+# Static snapshots for lite mode: PNG (palette-quantised) unless the chart is listed as SVG
+STATIC_WIDTH  = 700
+STATIC_HEIGHT = 450
+STATIC_FORMATS = {
+    "population_trend": "svg",
+    "population_growth_palestine": "svg",
+    "population_growth_israel": "svg",
+    "cost_deaths_per_year": "svg",
+}
+PNG_COLORS = 64
+
+# Trace attributes that carry the data arrays worth downcasting
+_ARRAY_KEYS = ("x", "y", "z", "values", "customdata", "text")
+
+
+class FigureBudgetError(Exception):
+    """A chart's serialized payload grew past its byte budget."""
+
+
+def register_dashboard_template(accent: str, primary: str) -> go.layout.Template:
+    """
+    Register the dashboard template (white plot area, black text, light grid) and make it
+    the default, so Plotly Express picks its colorway instead of Streamlit's placeholders.
+    """
+    axis = dict(
+        showgrid=True,
+        gridcolor="rgba(0,0,0,0.1)",
+        tickfont=dict(color="#000000"),
+        title=dict(font=dict(size=14, color="#000000")),
+    )
+    template = go.layout.Template(layout=dict(
+        plot_bgcolor="rgba(255,255,255,1)",
+        paper_bgcolor="rgba(255,255,255,1)",
+        font=dict(family="Poppins, sans-serif", color="#000000"),
+        colorway=[accent, primary, "#8D99AE", "#D90429", "#6A994E", "#BC6C25", "#5E548E", "#0081A7"],
+        legend=dict(title=dict(text=""), font=dict(color="#000000"), bgcolor="rgba(255,255,255,1)"),
+        xaxis=axis,
+        yaxis=axis,
+    ))
+    pio.templates[TEMPLATE_NAME] = template
+    pio.templates.default = TEMPLATE_NAME
+    return template
+
+
+def _strip_defaults(values: dict, defaults: dict) -> dict:
+    # Drop every leaf that repeats the template value; recurse into nested dicts
+    stripped = {}
+    for key, value in values.items():
+        default = defaults.get(key)
+        if isinstance(value, dict) and isinstance(default, dict):
+            value = _strip_defaults(value, default)
+            if value:
+                stripped[key] = value
+        elif value != default:
+            stripped[key] = value
+    return stripped
+
+
+def _downcast(array):
+    array = np.asarray(array)
+    if array.dtype.kind == "f":
+        finite = array[np.isfinite(array)]
+        if finite.size == array.size and np.array_equal(finite, np.round(finite)):
+            if finite.size == 0 or (finite.min() >= np.iinfo(np.int32).min and finite.max() <= np.iinfo(np.int32).max):
+                return array.astype(np.int32)
+        return array.astype(np.float32)
+    if array.dtype.kind in "iu":
+        for dtype in (np.int8, np.int16, np.int32):
+            info = np.iinfo(dtype)
+            if array.size == 0 or (array.min() >= info.min and array.max() <= info.max):
+                return array.astype(dtype)
+    return array
+
+
+def slim_figure(fig: go.Figure) -> dict:
+    """
+    Figure dict ready for st.plotly_chart: dashboard template, no layout values the
+    template repeats, and numeric arrays downcast to the smallest lossless integer
+    type (float32 for non-integral data).
+    """
+    template = pio.templates[TEMPLATE_NAME].to_plotly_json()
+    figure = fig.to_plotly_json()
+    layout = {key: value for key, value in figure.get("layout", {}).items() if key != "template"}
+    figure["layout"] = _strip_defaults(layout, template["layout"])
+    figure["layout"]["template"] = copy.deepcopy(template)
+
+    for trace in figure.get("data", []):
+        for key in _ARRAY_KEYS:
+            value = trace.get(key)
+            if value is None or isinstance(value, (str, dict)):
+                continue
+            array = np.asarray(value)
+            if array.dtype.kind in "fiu":
+                trace[key] = _downcast(array)
+    return figure
+
+
+def figure_bytes(figure) -> int:
+    """
+    Size of the JSON that is actually sent to the browser.
+    """
+    return len(pio.to_json(figure, validate=False).encode("utf-8"))
+
+
+def figure_digest(figure) -> str:
+    """
+    SHA-256 of the figure's JSON; equal figures (e.g. a chart in its default state) get
+    the same digest in every process, so a stored snapshot can stand in for a render.
+    """
+    return hashlib.sha256(pio.to_json(figure, validate=False).encode("utf-8")).hexdigest()
+
+
+def check_budget(name: str, size: int):
+    """
+    Raise FigureBudgetError when a chart is larger than its budget.
+    """
+    budget = FIGURE_BUDGETS.get(name, DEFAULT_FIGURE_BUDGET)
+    if size > budget:
+        raise FigureBudgetError(f"Chart '{name}' payload is {size:,} bytes, over its {budget:,} byte budget")
+
+
+def static_rendering_available() -> bool:
+    """
+    True when kaleido (used by plotly.io.to_image) is installed.
+    """
+    return importlib.util.find_spec("kaleido") is not None
+
+
+def compress_png(data: bytes, colors: int = PNG_COLORS) -> bytes:
+    """
+    Re-encode a chart PNG with a small palette; flat chart colours survive, the file shrinks several times.
+    """
+    image = Image.open(io.BytesIO(data)).convert("RGB").quantize(colors=colors)
+    out = io.BytesIO()
+    image.save(out, format="PNG", optimize=True)
+    return out.getvalue()
+
+
+def render_static(figure: dict, name: str) -> tuple:
+    """
+    (format, bytes) of a static snapshot of a slimmed figure, sized from its layout height.
+    Raises whatever kaleido raises when it cannot render (e.g. no browser available).
+    """
+    fmt = STATIC_FORMATS.get(name, "png")
+    height = figure.get("layout", {}).get("height") or STATIC_HEIGHT
+    image = pio.to_image(figure, format=fmt, width=STATIC_WIDTH, height=height, validate=False)
+    return fmt, (compress_png(image) if fmt == "png" else image)
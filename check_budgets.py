@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Check every dashboard chart against its payload budget (charts.FIGURE_BUDGETS).
+
+Builds an aggregate store from fixture tables shaped like the real sources (same
+columns, years and row counts), runs the app headless with DASHBOARD_STRICT_BUDGETS=1,
+opens every page and switches each widget that changes which charts are drawn or how
+large they are. Exits non-zero when any chart is over its budget or a page fails:
+
+    python check_budgets.py            # run from CI before merging chart changes
+
+Needs nothing beyond requirements.txt; no network access, the real sources are not read.
+"""
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import data
+from validation import validate_death_data
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+# Roughly the size and spread of the real casualty list
+FIXTURE_ROWS = 11_000
+FIXTURE_SEED = 0
+
+
+def fixture_casualties(rows: int = FIXTURE_ROWS, seed: int = FIXTURE_SEED) -> pd.DataFrame:
+    """
+    Raw casualty table with the source's columns, dates 2000–2021 and some unknown values.
+    """
+    rng = np.random.default_rng(seed)
+    places = data.read_gazetteer()
+    districts = places.loc[places["kind"] == "district", "name"].to_numpy()
+    regions = places.loc[places["kind"] == "region", "name"].to_numpy()
+    dates = pd.Timestamp("2000-01-01") + pd.to_timedelta(rng.integers(0, 8036, rows), unit="D")
+    return pd.DataFrame({
+        "Name": [f"Person {i}" for i in range(rows)],
+        "Date of death": dates.strftime("%Y-%m-%d"),
+        "Age": rng.integers(0, 95, rows).astype(float),
+        "Citizenship": rng.choice(["Palestinian", "Israeli", "Jordanian"], rows, p=[0.85, 0.14, 0.01]),
+        "Gender": rng.choice(["M", "F", None], rows, p=[0.88, 0.1, 0.02]),
+        "Event location": rng.choice(districts, rows),
+        "Event location - District": rng.choice(districts, rows),
+        "Event location - Region": rng.choice(regions, rows),
+        "Place of residence - District": rng.choice(districts, rows),
+        "Type of injury": rng.choice(["gunfire", "explosion", "stabbing", "shelling"], rows),
+        "Ammunition": rng.choice(["live ammunition", "missile", "knife", "rubber bullets"], rows),
+        "Killed by": rng.choice(["Israeli security forces", "Palestinian civilians", "Israeli civilians"], rows),
+        "Took part in the hostilities": rng.choice(["Yes", "No", "Unknown"], rows),
+    })
+
+
+def fixture_population() -> tuple:
+    """
+    Cleaned population tables (see data.read_population_data) on the source's year grid.
+    """
+    years = list(range(1955, 2020, 5)) + list(range(2020, 2026))
+    tables = []
+    for base, rate in ((1.0e6, 0.028), (1.75e6, 0.022)):
+        population = [base * (1 + rate) ** (year - years[0]) for year in years]
+        tables.append(pd.DataFrame({"Year": years, "Population": population,
+                                    "Yearly % Change": [rate * 100] * len(years)}))
+    return tuple(tables)
+
+
+def build_fixture_store(store_dir: str) -> str:
+    raw = fixture_casualties()
+    df_full = data.clean_death_chunk(raw)
+    df_p, df_i = fixture_population()
+    arrays = data.build_population_aggregates(df_p, df_i)
+    arrays.update(data.build_cost_aggregates(df_full))
+    arrays.update(data.build_per_capita_aggregates(arrays, arrays))
+    quality = data.build_quality_report(validate_death_data(raw), df_p, df_i)
+    return data.write_store(store_dir, arrays, tables={"casualties": df_full}, quality=quality)
+
+
+def widget_states(at):
+    """
+    (description, action) pairs; each action sets widgets on the AppTest before a rerun.
+    """
+    def page(name):
+        return lambda: at.radio(key="main_navigation").set_value(name)
+
+    states = [("Population page", page("The Population")), ("Cost page", page("The Cost"))]
+    states.append(("Deaths per 100k", lambda: at.radio(key="deaths_per_year_scale").set_value("Deaths per 100k Residents")))
+    for view in ("Bars by gender", "Age pyramid"):
+        for preset in ("Standard groups", "5-year", "10-year", "Single years"):
+            states.append((f"Age {view.lower()}, {preset.lower()}", lambda view=view, preset=preset: (
+                at.radio(key="cost_age_view").set_value(view), at.radio(key="cost_age_brackets").set_value(preset))))
+    for grain in ("Total", "Year", "Quarter", "Month"):
+        for group_by in ("(none)", "Citizenship", "Event location", "Type of injury"):
+            states.append((f"Explorer by {group_by} per {grain.lower()}", lambda grain=grain, group_by=group_by: (
+                at.selectbox(key="explore_grain").set_value(grain),
+                at.selectbox(key="explore_group_by").set_value(group_by))))
+    return states
+
+
+def main() -> int:
+    from streamlit.testing.v1 import AppTest
+
+    with tempfile.TemporaryDirectory(prefix="budget-check-") as store_dir:
+        build_fixture_store(store_dir)
+        os.environ["DASHBOARD_STORE"] = store_dir
+        os.environ["DASHBOARD_STRICT_BUDGETS"] = "1"
+
+        at = AppTest.from_file(APP_PATH, default_timeout=120)
+        at.run()
+        failures = []
+        for description, action in widget_states(at):
+            action()
+            at.run()
+            failures += [f"{description}: {message}" for message in dict.fromkeys(error.value for error in at.exception)]
+
+        at.radio(key="main_navigation").set_value("Data Sources")
+        at.run()
+        sizes = next((frame.value for frame in at.dataframe if "KB sent" in frame.value.columns), None)
+
+    if sizes is not None:
+        print(sizes.to_string(index=False))
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    print(f"{len(failures)} failure(s)" if failures else "All charts within budget")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
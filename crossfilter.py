@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+Client-side linked view of the Cost page charts.
+
+The casualty count cubes (a few KB of integers, see data.build_cost_aggregates)
+are embedded once in a self-contained HTML/Plotly.js document. Brushing a year
+range on the line chart re-sums the cubes in the browser and restyles the
+heatmaps, gender pies and age bars, with no round trip to the server.
+"""
+import json
+
+import numpy as np
+
+from data import SIDES, GENDERS, MONTHS, AGE_LABELS, DEATH_WINDOW
+
+# Same major version as the plotly.js that plotly>=6 bundles. Loaded from the CDN rather than
+# inlined: the component is a srcdoc iframe, so an inlined 4-5 MB bundle would be resent with
+# every render, while the CDN copy stays in the browser cache across sessions.
+PLOTLY_JS_URL = "https://cdn.plot.ly/plotly-3.0.1.min.js"
+
+_TEMPLATE = """
+<style>
+  body { margin: 0; font-family: 'Poppins', sans-serif; }
+  .cf-row { display: flex; gap: 16px; margin-bottom: 16px; }
+  .cf-cell { flex: 1; min-width: 0; }
+  .cf-title { color: __ACCENT__; font-weight: 700; font-size: 1rem; margin: 0.5rem 0; }
+  .cf-hint { color: #FFFFFF; font-size: 0.85rem; opacity: 0.85; margin-bottom: 0.5rem; }
+  .cf-plot { background: #FFFFFF; border-radius: 4px; }
+</style>
+<div class="cf-hint" id="cf-hint"></div>
+<div class="cf-plot" id="cf-line" style="height:360px"></div>
+<div class="cf-row">
+  <div class="cf-cell"><div class="cf-title">Israeli Deaths per Month &amp; Year</div><div class="cf-plot" id="cf-heat-0" style="height:320px"></div></div>
+  <div class="cf-cell"><div class="cf-title">Palestinian Deaths per Month &amp; Year</div><div class="cf-plot" id="cf-heat-1" style="height:320px"></div></div>
+</div>
+<div class="cf-row">
+  <div class="cf-cell"><div class="cf-title">Israeli Deaths by Gender</div><div class="cf-plot" id="cf-pie-0" style="height:300px"></div></div>
+  <div class="cf-cell"><div class="cf-title">Palestinian Deaths by Gender</div><div class="cf-plot" id="cf-pie-1" style="height:300px"></div></div>
+</div>
+<div class="cf-row">
+  <div class="cf-cell"><div class="cf-title">Israeli Deaths by Age Group &amp; Gender</div><div class="cf-plot" id="cf-age-0" style="height:320px"></div></div>
+  <div class="cf-cell"><div class="cf-title">Palestinian Deaths by Age Group &amp; Gender</div><div class="cf-plot" id="cf-age-1" style="height:320px"></div></div>
+</div>
+<script src="__PLOTLY_JS__"></script>
+<script>
+const CUBE = __CUBE__;
+const ACCENT = "__ACCENT__", PRIMARY = "__PRIMARY__";
+const SIDE_COLORS = {"Israeli": PRIMARY, "Palestinian": ACCENT};
+const BASE = {
+  plot_bgcolor: "#FFFFFF", paper_bgcolor: "#FFFFFF", font: {color: "#000000"},
+  margin: {t: 20, b: 40, l: 50, r: 20},
+  xaxis: {gridcolor: "rgba(0,0,0,0.1)"}, yaxis: {gridcolor: "rgba(0,0,0,0.1)"},
+};
+const CONFIG = {responsive: true, displaylogo: false};
+const nYears = CUBE.years.length;
+
+function layout(extra) { return Object.assign({}, BASE, extra); }
+
+function sumYears(series, lo, hi) {
+  // series[y] is a number or a nested array; returns the element-wise sum over years lo..hi
+  let acc = JSON.parse(JSON.stringify(series[lo]));
+  const add = (a, b) => Array.isArray(a) ? a.map((v, i) => add(v, b[i])) : a + b;
+  for (let y = lo + 1; y <= hi; y++) acc = add(acc, series[y]);
+  return acc;
+}
+
+function drawLine() {
+  const traces = CUBE.sides.map((side, s) => ({
+    x: CUBE.years, y: CUBE.deaths[s].map(months => months.reduce((a, b) => a + b, 0)),
+    mode: "lines+markers", name: side, line: {color: SIDE_COLORS[side], width: 2.5}, marker: {size: 6},
+  })).reverse();
+  Plotly.newPlot("cf-line", traces, layout({
+    dragmode: "select", selectdirection: "h",
+    xaxis: {title: {text: "Year"}, gridcolor: "rgba(0,0,0,0.1)"},
+    yaxis: {title: {text: "Number of Deaths"}, gridcolor: "rgba(0,0,0,0.1)"},
+    legend: {title: {text: ""}},
+  }), CONFIG);
+}
+
+function drawLinked(lo, hi) {
+  document.getElementById("cf-hint").textContent =
+    `Showing ${CUBE.years[lo]}–${CUBE.years[hi]}. Drag across the line chart to select years; double-click to reset.`;
+  const years = CUBE.years.slice(lo, hi + 1);
+  CUBE.sides.forEach((side, s) => {
+    const z = CUBE.months.map((_, m) => CUBE.deaths[s].slice(lo, hi + 1).map(row => row[m]));
+    Plotly.react(`cf-heat-${s}`, [{
+      type: "heatmap", x: years, y: CUBE.months, z: z,
+      colorscale: [[0, "#FFFFFF"], [0.5, ACCENT], [1, PRIMARY]], colorbar: {title: {text: "Deaths"}},
+    }], layout({yaxis: {autorange: "reversed"}}), CONFIG);
+
+    const gender = sumYears(CUBE.gender[s], lo, hi);
+    const order = gender.map((v, g) => g).sort((a, b) => gender[b] - gender[a]);
+    Plotly.react(`cf-pie-${s}`, [{
+      type: "pie", labels: order.map(g => CUBE.genders[g]), values: order.map(g => gender[g]),
+      marker: {colors: [PRIMARY, ACCENT]}, hole: 0.4, textinfo: "percent+label", sort: false,
+    }], layout({margin: {t: 20, b: 20, l: 20, r: 20}}), CONFIG);
+
+    const age = sumYears(CUBE.age[s], lo, hi);   // [age group][gender]
+    Plotly.react(`cf-age-${s}`, CUBE.genders.map((label, g) => ({
+      type: "bar", name: label, x: CUBE.age_labels, y: age.map(row => row[g]),
+      marker: {color: label === "Female" ? ACCENT : PRIMARY},
+    })), layout({barmode: "group", xaxis: {title: {text: "Age Group"}}, yaxis: {title: {text: "Number of Deaths"}}}), CONFIG);
+  });
+}
+
+drawLine();
+drawLinked(0, nYears - 1);
+
+const line = document.getElementById("cf-line");
+line.on("plotly_selected", event => {
+  if (!event || !event.range) return;
+  const [x0, x1] = event.range.x;
+  const lo = Math.max(0, Math.ceil(x0) - CUBE.years[0]);
+  const hi = Math.min(nYears - 1, Math.floor(x1) - CUBE.years[0]);
+  if (lo <= hi) drawLinked(lo, hi);
+});
+line.on("plotly_deselect", () => drawLinked(0, nYears - 1));
+line.on("plotly_doubleclick", () => drawLinked(0, nYears - 1));
+</script>
+"""
+
+
+def build_cube_payload(cost: dict, window=DEATH_WINDOW) -> dict:
+    """
+    The JSON-ready cube shipped to the browser: axes plus nested integer lists, cut to the
+    years in `window` like the Cost page's own charts.
+    """
+    years = np.asarray(cost["cost.years"])
+    in_window = (years >= window[0]) & (years <= window[1])
+    return {
+        "years": years[in_window].tolist(),
+        "sides": list(SIDES),
+        "months": list(MONTHS),
+        "genders": list(GENDERS),
+        "age_labels": list(AGE_LABELS),
+        "deaths": np.asarray(cost["cost.deaths"])[:, in_window].tolist(),   # [side][year][month]
+        "gender": np.asarray(cost["cost.gender"])[:, in_window].tolist(),   # [side][year][gender]
+        "age": np.asarray(cost["cost.age"])[:, in_window].tolist(),         # [side][year][age group][gender]
+    }
+
+
+def render_crossfilter_html(cost: dict, accent: str, primary: str) -> str:
+    """
+    Self-contained HTML document for the linked view.
+    """
+    cube = json.dumps(build_cube_payload(cost), separators=(",", ":"))
+    return (_TEMPLATE
+            .replace("__CUBE__", cube)
+            .replace("__PLOTLY_JS__", PLOTLY_JS_URL)
+            .replace("__ACCENT__", accent)
+            .replace("__PRIMARY__", primary))
@@ -0,0 +1,700 @@
+# -*- coding: utf-8 -*-
+"""
+Data layer for the dashboard: reading the source CSVs, reducing them to the
+small aggregate arrays the pages draw from, and the shared on-disk store.
+
+This module does not import streamlit, so it can be run on its own as the
+store builder:
+
+    python data.py build --store /srv/dashboard-store     # always publish a new build
+    python data.py prewarm --store /srv/dashboard-store   # build only if missing or corrupt
+
+Replicas started with DASHBOARD_STORE=/srv/dashboard-store then memory-map
+the arrays instead of downloading and aggregating the CSVs themselves. Without
+DASHBOARD_STORE the app uses DEFAULT_STORE, a per-user cache directory, so a
+restarted worker starts warm too.
+
+The builder downloads each casualty source to a file in its work directory and
+reads it back in chunks (see ingest_death_data), so it holds one chunk of rows at
+a time, plus the count cubes and an 8-byte hash per row for the duplicate check.
+"""
+import argparse
+import functools
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import urllib.parse
+import urllib.request
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl   # POSIX only; without it concurrent prewarms are not serialised
+except ImportError:
+    fcntl = None
+
+from projection import build_dense_matrix, value_at
+from validation import AGE_RANGE, parse_ages, parse_dates, validate_death_data, validate_population_data, merge_reports
+
+# ---------------------------------------------------------------------------
+# 1. SOURCES & VERSIONING
+# ---------------------------------------------------------------------------
+
+# Bump DATA_VERSION whenever a source file or the cleaning steps change;
+# it is part of every cache key and store manifest, so old entries are never served again.
+DATA_VERSION = "2025.6"
+
+URL_POPULATION_PALESTINE = "https://drive.google.com/uc?id=1Kr3mWDhTErT9OlibX_aBaHVtNvRTlZhx"
+URL_POPULATION_ISRAEL    = "https://drive.google.com/uc?id=1pfdUGsK4uKs-c7KUQ_zsnKVOkWadu0cw"
+URL_BODY_COMPLETE        = "https://drive.google.com/uc?id=1wwXqjPVl2Uv81Xs8XANO2AhViMnVPcbD"  # dataset with gender, date, age, citizenship
+URL_BODY_SIMPLE          = "https://drive.google.com/uc?id=1rCjmp3-wjvqD7a0TmorOUDXv1cqnpczC"  # dataset without gender
+
+# Casualty lists the store builder streams, in order, as (url, encoding). All share the
+# columns of URL_BODY_COMPLETE; text is normalised to Unicode NFC whatever the source encoding.
+CASUALTY_SOURCES = (
+    (URL_BODY_COMPLETE, "windows-1252"),
+)
+CHUNK_ROWS = 50_000
+
+# Remote sources are copied to disk in blocks of this size before pandas reads them in
+# chunks; given a URL, pandas would read the whole response into memory first.
+DOWNLOAD_BLOCK_BYTES = 1 << 20
+DOWNLOAD_TIMEOUT     = 60   # seconds without data before a download is abandoned
+
+COUNTRIES  = ("Palestine", "Israel")
+SIDES      = ("Israeli", "Palestinian")
+SIDE_COUNTRY = {"Israeli": "Israel", "Palestinian": "Palestine"}   # population used for per-capita rates
+GENDERS    = ("Female", "Male")
+MONTHS     = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+AGE_STARTS = [0, 18, 31, 46, 61, 76]   # first age of each standard bracket
+AGE_LABELS = ["0-17", "18-30", "31-45", "46-60", "61-75", "76+"]
+AGE_MAX    = AGE_RANGE[1]               # single-year histograms cover ages 0..AGE_MAX
+
+# Bundled gazetteer of district / region centroids the casualty map bins deaths into.
+# Rows are matched on "Event location - District", then on "Event location - Region".
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "gazetteer.csv")
+
+# Headline figures: deaths within DEATH_WINDOW on the Cost page and population growth between
+# COMPARE_YEARS on the Population page (see build_summary)
+DEATH_WINDOW  = (2000, 2021)
+COMPARE_YEARS = (1955, 2025)
+
+# Dense annual population series (see projection.py)
+POPULATION_INTERPOLATION = "pchip"
+POPULATION_PROJECT_TO    = 2035
+
+# ---------------------------------------------------------------------------
+# 2. READING THE SOURCES
+# ---------------------------------------------------------------------------
+
+def read_population_data(url_palestine: str, url_israel: str):
+    """
+    Download both population tables and turn the formatted string columns into numbers.
+    """
+    df_p = pd.read_csv(url_palestine)
+    df_i = pd.read_csv(url_israel)
+    # Clean string columns (remove ',' and '%')
+    for df in (df_p, df_i):
+        df["Population"]       = pd.to_numeric(df["Population"].str.replace(",", ""), errors="coerce")
+        df["Yearly % Change"]  = pd.to_numeric(df["Yearly % Change"].str.replace("%", ""), errors="coerce")
+        df["Yearly Change"]    = pd.to_numeric(df["Yearly Change"].str.replace(",", ""), errors="coerce")
+        df["Migrants (net)"]   = pd.to_numeric(df["Migrants (net)"].str.replace(",", ""), errors="coerce")
+        df["Urban Pop %"]      = pd.to_numeric(df["Urban Pop %"].str.replace("%", ""), errors="coerce")
+        df["Urban Population"] = pd.to_numeric(df["Urban Population"].str.replace(",", ""), errors="coerce")
+        df["Country's Share of World Pop"] = pd.to_numeric(df["Country's Share of World Pop"].str.replace("%", ""), errors="coerce")
+        df["World Population"] = pd.to_numeric(df["World Population"].str.replace(",", ""), errors="coerce")
+    df_p["Country"] = "Palestine"
+    df_i["Country"] = "Israel"
+    return df_p, df_i
+
+
+def clean_death_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Clean one chunk (or all) of a raw casualty table. Every chunk comes out with the same
+    dtypes whatever its contents: datetime dates, nullable integer ages, NFC strings elsewhere.
+    """
+    # Convert Date of Death to datetime; rows without a usable date are dropped
+    df = df.assign(**{"Date of death": parse_dates(df["Date of death"])})
+    df = df.dropna(subset=["Date of death"])
+    # Missing, unparsable or implausible ages stay <NA> (unknown) instead of becoming 0
+    df["Age"] = parse_ages(df["Age"])
+    for column in df.columns.drop(["Date of death", "Age"]):
+        df[column] = df[column].astype("string").str.strip().str.normalize("NFC")
+    return df
+
+
+def download_source(url: str, work_dir: str = None) -> str:
+    """
+    Copy a remote file to a temporary file in work_dir, DOWNLOAD_BLOCK_BYTES at a time.
+    Returns the path of the copy; the caller deletes it.
+    """
+    handle, path = tempfile.mkstemp(prefix="source-", suffix=".csv", dir=work_dir)
+    try:
+        with os.fdopen(handle, "wb") as out, urllib.request.urlopen(url, timeout=DOWNLOAD_TIMEOUT) as response:
+            shutil.copyfileobj(response, out, DOWNLOAD_BLOCK_BYTES)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+def iter_death_chunks(sources=CASUALTY_SOURCES, chunk_rows: int = CHUNK_ROWS, work_dir: str = None):
+    """
+    Raw casualty rows from every source, chunk_rows at a time. Remote sources are first
+    downloaded to work_dir (default: the temp dir); local paths are read in place.
+    Undecodable bytes are replaced rather than failing the whole build.
+    """
+    for url, encoding in sources:
+        remote = urllib.parse.urlparse(url).scheme in ("http", "https", "ftp")
+        path = download_source(url, work_dir) if remote else url
+        try:
+            with pd.read_csv(path, encoding=encoding, encoding_errors="replace", chunksize=chunk_rows) as reader:
+                yield from reader
+        finally:
+            if remote:
+                os.remove(path)
+
+
+def build_quality_report(death_quality: dict, df_p: pd.DataFrame, df_i: pd.DataFrame) -> dict:
+    """
+    Full quality report: the casualty report plus the population table checks.
+    """
+    return {**death_quality, "checks": death_quality["checks"] + validate_population_data(df_p, df_i)}
+
+def _place_key(values: pd.Series) -> pd.Series:
+    return (values.astype("string").str.casefold()
+            .str.replace(r"[-_&]", " ", regex=True).str.replace(r"\s+", " ", regex=True).str.strip())
+
+
+@functools.lru_cache(maxsize=1)
+def read_gazetteer(path: str = GAZETTEER_PATH) -> pd.DataFrame:
+    """
+    Bin table for the casualty map: name, kind (district / region), lat, lon, aliases.
+    """
+    return pd.read_csv(path, keep_default_na=False)
+
+
+@functools.lru_cache(maxsize=1)
+def _gazetteer_lookup(path: str = GAZETTEER_PATH) -> dict:
+    gazetteer = read_gazetteer(path)
+    lookup = {}
+    for index, row in gazetteer.iterrows():
+        for name in [row["name"], *filter(None, row["aliases"].split("|"))]:
+            lookup[_place_key(pd.Series([name])).iloc[0]] = index
+    return lookup
+
+
+def geocode_bins(df: pd.DataFrame, path: str = GAZETTEER_PATH) -> np.ndarray:
+    """
+    Gazetteer row index of every casualty row (-1 when neither district nor region matches).
+    Each distinct place name is looked up once, not once per row.
+    """
+    bins = np.full(len(df), -1, dtype=np.intp)
+    lookup = _gazetteer_lookup(path)
+    for column in ("Event location - District", "Event location - Region"):
+        if column not in df.columns:
+            continue
+        places = pd.Categorical(_place_key(df[column]))
+        matched = np.array([lookup.get(place, -1) for place in places.categories], dtype=np.intp)
+        codes = np.asarray(places.codes)
+        found = np.where(codes >= 0, matched[codes] if len(matched) else -1, -1)
+        bins = np.where(bins >= 0, bins, found)
+    return bins
+
+# ---------------------------------------------------------------------------
+# 3. AGGREGATES
+# ---------------------------------------------------------------------------
+
+def build_population_aggregates(df_p: pd.DataFrame, df_i: pd.DataFrame) -> dict:
+    """
+    Published year, population and yearly % change per country, sorted by year, plus the
+    dense annual (country, year) matrices in COUNTRIES order:
+
+    - population.dense.years    : year axis, one entry per calendar year
+    - population.dense.value    : interpolated / projected population
+    - population.dense.change   : annual % change of the dense series
+    - population.dense.observed : False where the value is a projection
+    """
+    arrays = {}
+    for country, df in zip(COUNTRIES, (df_p, df_i)):
+        df = df.sort_values("Year")
+        arrays[f"population.{country}.year"]   = df["Year"].to_numpy(dtype=np.int32)
+        arrays[f"population.{country}.value"]  = df["Population"].to_numpy(dtype=np.float64)
+        arrays[f"population.{country}.change"] = df["Yearly % Change"].to_numpy(dtype=np.float64)
+
+    last_published = max(int(arrays[f"population.{country}.year"].max()) for country in COUNTRIES)
+    dense = build_dense_matrix(
+        {country: (arrays[f"population.{country}.year"], arrays[f"population.{country}.value"]) for country in COUNTRIES},
+        last_year=max(last_published, POPULATION_PROJECT_TO),
+        method=POPULATION_INTERPOLATION,
+    )
+    for name, array in dense.items():
+        arrays[f"population.dense.{name}"] = array
+    return arrays
+
+
+def build_cost_aggregates(df_full: pd.DataFrame) -> dict:
+    """
+    Reduce the casualty table to dense count cubes over a contiguous year axis.
+
+    - cost.deaths : (side, year, month)       all recorded deaths
+    - cost.gender : (side, year, gender)      rows with gender F/M
+    - cost.age_years : (side, year, age 0..AGE_MAX, gender) rows with gender F/M and a known age
+    - cost.age    : (side, year, age, gender) the same rows in the standard AGE_LABELS brackets
+    - cost.district : (side, year, bin)       rows geocoded to a gazetteer bin (see geocode_bins)
+
+    Rows with an unknown age (<NA>) are left out of the age cubes only, so cost.deaths minus
+    cost.age is exactly the number of deaths without a known gender or age. Any other age
+    brackets come from cost.age_years through rebin_ages.
+    """
+    dates = df_full["Date of death"]
+    years = np.arange(dates.dt.year.min(), dates.dt.year.max() + 1, dtype=np.int32)
+
+    side_idx   = pd.Categorical(df_full["Citizenship"], categories=SIDES).codes
+    year_idx   = (dates.dt.year.to_numpy() - years[0]).astype(np.intp)
+    month_idx  = (dates.dt.month.to_numpy() - 1).astype(np.intp)
+    gender_idx = pd.Categorical(df_full["Gender"], categories=("F", "M")).codes
+    age_idx    = df_full["Age"].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    n_sides, n_years = len(SIDES), len(years)
+    on_side = side_idx >= 0
+    deaths = np.zeros((n_sides, n_years, 12), dtype=np.int32)
+    np.add.at(deaths, (side_idx[on_side], year_idx[on_side], month_idx[on_side]), 1)
+
+    gendered = on_side & (gender_idx >= 0)
+    gender = np.zeros((n_sides, n_years, len(GENDERS)), dtype=np.int32)
+    np.add.at(gender, (side_idx[gendered], year_idx[gendered], gender_idx[gendered]), 1)
+
+    aged = gendered & ~np.isnan(age_idx)
+    age_years = np.zeros((n_sides, n_years, AGE_MAX + 1, len(GENDERS)), dtype=np.int32)
+    np.add.at(age_years, (side_idx[aged], year_idx[aged], age_idx[aged].astype(np.intp), gender_idx[aged]), 1)
+
+    bin_idx = geocode_bins(df_full)
+    placed = on_side & (bin_idx >= 0)
+    district = np.zeros((n_sides, n_years, len(read_gazetteer())), dtype=np.int32)
+    np.add.at(district, (side_idx[placed], year_idx[placed], bin_idx[placed]), 1)
+
+    return {"cost.years": years, "cost.deaths": deaths, "cost.gender": gender,
+            "cost.age_years": age_years, "cost.age": rebin_ages(age_years, AGE_STARTS),
+            "cost.district": district}
+
+
+def age_bracket_labels(starts) -> list:
+    """
+    "a-b" labels for brackets starting at the given ages; the last one is open ("a+").
+    """
+    starts = list(starts)
+    labels = [f"{start}-{end - 1}" if end - 1 > start else f"{start}" for start, end in zip(starts, starts[1:])]
+    return labels + [f"{starts[-1]}+"]
+
+
+def rebin_ages(age_years: np.ndarray, starts, axis: int = 2) -> np.ndarray:
+    """
+    Sum a single-year age histogram into brackets starting at `starts` (ascending ages), the
+    last bracket running to AGE_MAX. O(brackets) per cell: differences of one cumulative sum.
+    """
+    starts = np.asarray(starts, dtype=np.intp)
+    ends = np.append(starts[1:], AGE_MAX + 1)
+    if starts.size == 0 or starts[0] < 0 or np.any(ends <= starts) or ends[-1] > AGE_MAX + 1:
+        raise ValueError(f"Age brackets must start at ascending ages between 0 and {AGE_MAX}")
+    cumulative = np.cumsum(np.asarray(age_years), axis=axis, dtype=np.int64)
+    shape = list(cumulative.shape)
+    shape[axis] = 1
+    cumulative = np.concatenate([np.zeros(shape, dtype=np.int64), cumulative], axis=axis)
+    counts = np.take(cumulative, ends, axis=axis) - np.take(cumulative, starts, axis=axis)
+    return counts.astype(np.int32)
+
+
+def merge_cost_aggregates(total: dict, part: dict) -> dict:
+    """
+    Sum two sets of cost cubes (see build_cost_aggregates) over the union of their year axes.
+    """
+    if total is None:
+        return part
+    first = min(total["cost.years"][0], part["cost.years"][0])
+    last = max(total["cost.years"][-1], part["cost.years"][-1])
+    years = np.arange(first, last + 1, dtype=np.int32)
+    merged = {"cost.years": years}
+    for name in ("cost.deaths", "cost.gender", "cost.age_years", "cost.age", "cost.district"):
+        shape = list(total[name].shape)
+        shape[1] = len(years)
+        cube = np.zeros(shape, dtype=np.int32)
+        for source in (total, part):
+            offset = int(source["cost.years"][0] - first)
+            cube[:, offset:offset + len(source["cost.years"])] += source[name]
+        merged[name] = cube
+    return merged
+
+
+def ingest_death_data(sources=CASUALTY_SOURCES, snapshot_path: str = None, chunk_rows: int = CHUNK_ROWS,
+                      work_dir: str = None):
+    """
+    Stream the casualty sources chunk by chunk: validate, clean, fold into the cost cubes
+    and, if snapshot_path is given, append to a Parquet snapshot of the cleaned rows.
+    Only one chunk of rows is held in memory at a time; remote sources are downloaded to
+    work_dir first (see iter_death_chunks). Returns (cost aggregates, quality report).
+    """
+    state = {"cost": None, "quality": None, "seen": {}}
+
+    def cleaned_chunks():
+        for raw in iter_death_chunks(sources, chunk_rows, work_dir):
+            state["quality"] = merge_reports(state["quality"], validate_death_data(raw, seen_keys=state["seen"]))
+            chunk = clean_death_chunk(raw)
+            if len(chunk):
+                state["cost"] = merge_cost_aggregates(state["cost"], build_cost_aggregates(chunk))
+            yield chunk
+
+    if snapshot_path is not None:
+        from query import write_parquet_chunks   # duckdb is only needed when snapshotting rows
+        write_parquet_chunks(cleaned_chunks(), snapshot_path)
+    else:
+        for _ in cleaned_chunks():
+            pass
+    if state["cost"] is None:
+        raise ValueError("No casualty rows with a valid date in the sources")
+    return state["cost"], state["quality"]
+
+
+def build_per_capita_aggregates(population: dict, cost: dict) -> dict:
+    """
+    Deaths per 100,000 residents of the victim's side, on the casualty year axis.
+
+    - percapita.years : same axis as cost.years
+    - percapita.rate  : (side, year); NaN where no population value exists for that year
+
+    Population comes from the dense annual series, so years the source skips are
+    interpolated rather than dropped.
+    """
+    years = np.asarray(cost["cost.years"])
+    deaths_year = np.asarray(cost["cost.deaths"]).sum(axis=2)           # (side, year)
+    dense_years = np.asarray(population["population.dense.years"])
+    dense_value = np.asarray(population["population.dense.value"])
+
+    # Align the casualty year axis onto the population axis in one vectorised gather
+    index = years - dense_years[0]
+    in_range = (index >= 0) & (index < len(dense_years))
+    rows = [COUNTRIES.index(SIDE_COUNTRY[side]) for side in SIDES]
+    residents = np.full((len(SIDES), len(years)), np.nan)
+    residents[:, in_range] = dense_value[np.ix_(rows, index[in_range])]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = deaths_year / residents * 100_000
+    return {"percapita.years": years, "percapita.rate": rate}
+
+
+def compare_year_options(population: dict):
+    """
+    Years the population growth comparison can use (published for both countries) and the
+    default (from, to) pair: COMPARE_YEARS, or the ends of the range where those are missing.
+    """
+    dense_years = np.asarray(population["population.dense.years"])
+    observed = np.asarray(population["population.dense.observed"]).all(axis=0)
+    options = dense_years[observed].tolist()
+    default = tuple(year if year in options else fallback
+                    for year, fallback in zip(COMPARE_YEARS, (options[0], options[-1])))
+    return options, default
+
+
+def build_summary(arrays: dict) -> dict:
+    """
+    Headline numbers of the Population and Cost pages, small enough to keep in the store
+    manifest so a page can show them before any array is loaded (see store_summary):
+
+    - deaths     : {"window": DEATH_WINDOW, "by_side": {side: deaths in the window}}
+    - population : {"years": (from, to), "by_country": {country: (population in from, in to)}}
+
+    Sections whose arrays are not in `arrays` are left out.
+    """
+    summary = {}
+    if "cost.deaths" in arrays:
+        years = np.asarray(arrays["cost.years"])
+        in_window = (years >= DEATH_WINDOW[0]) & (years <= DEATH_WINDOW[1])
+        deaths = np.asarray(arrays["cost.deaths"])[:, in_window].sum(axis=(1, 2))
+        summary["deaths"] = {"window": list(DEATH_WINDOW),
+                             "by_side": {side: int(deaths[row]) for row, side in enumerate(SIDES)}}
+    if "population.dense.value" in arrays:
+        _, (year_from, year_to) = compare_year_options(arrays)
+        dense_years = np.asarray(arrays["population.dense.years"])
+        dense_value = np.asarray(arrays["population.dense.value"])
+        summary["population"] = {"years": [year_from, year_to], "by_country": {
+            country: [value_at(dense_years, dense_value, row, year_from),
+                      value_at(dense_years, dense_value, row, year_to)]
+            for row, country in enumerate(COUNTRIES)}}
+    return summary
+
+# ---------------------------------------------------------------------------
+# 4. SHARED ON-DISK STORE
+# ---------------------------------------------------------------------------
+# Layout:  <store>/CURRENT            name of the live build directory
+#          <store>/prewarm.lock       held while a build is being produced (see prewarm_store)
+#          <store>/<build>/manifest.json   version, SHA-256 of every file, quality report, headline summary
+#          <store>/<build>/<array>.npy
+#          <store>/<build>/<table>.parquet   row-level snapshots (see query.py)
+# A build is written to its own directory and published by atomically
+# replacing CURRENT, so readers never see a half-written store. A build whose
+# files no longer match their checksums is treated like a missing one.
+
+STORE_KEEP_BUILDS = 2
+
+# Arrays the pages read. A build whose manifest lacks any of them (written before the array
+# was added) is treated as stale, whatever its version, and rebuilt by prewarm_store.
+REQUIRED_ARRAYS = frozenset({
+    "population.dense.years", "population.dense.value", "population.dense.change", "population.dense.observed",
+    "cost.years", "cost.deaths", "cost.gender", "cost.age_years", "cost.age", "cost.district",
+    "percapita.years", "percapita.rate",
+})
+DEFAULT_STORE = os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+                             "israel-palestine-dashboard", "store")
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_store(store_dir: str, arrays: dict, version: str = DATA_VERSION, tables: dict = None,
+                quality: dict = None, snapshots: dict = None) -> str:
+    """
+    Write a new build of the store and make it the current one. Returns the build path.
+    `tables` maps a name to a DataFrame, saved as a Parquet snapshot alongside the arrays, or to
+    the path of a Parquet file already written (e.g. by ingest_death_data), moved into the build;
+    `quality` is the validation report (see build_quality_report), kept in the manifest
+    together with the headline numbers (see build_summary). `snapshots` are lite-mode chart
+    images (see render_chart_snapshots).
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    build_dir = tempfile.mkdtemp(prefix=f"{version}-{time.strftime('%Y%m%dT%H%M%S')}-", dir=store_dir)
+    build_name = os.path.basename(build_dir)
+    os.chmod(build_dir, 0o755)   # mkdtemp is owner-only; replicas may run as another user
+
+    manifest = {"version": version, "built_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "arrays": {}, "tables": {},
+                "snapshots": {}, "quality": quality, "summary": build_summary(arrays)}
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        path = os.path.join(build_dir, f"{name}.npy")
+        np.save(path, array, allow_pickle=False)
+        manifest["arrays"][name] = {"dtype": array.dtype.str, "shape": list(array.shape), "sha256": _sha256(path)}
+    if tables:
+        from query import write_parquet, parquet_info   # duckdb is only needed when snapshotting rows
+        for name, table in tables.items():
+            path = os.path.join(build_dir, f"{name}.parquet")
+            if isinstance(table, str):
+                shutil.move(table, path)
+            else:
+                write_parquet(table, path)
+            rows, columns = parquet_info(path)
+            manifest["tables"][name] = {"rows": rows, "columns": columns, "sha256": _sha256(path)}
+    for name, (fmt, digest, image) in (snapshots or {}).items():
+        path = os.path.join(build_dir, f"{name}.{fmt}")
+        with open(path, "wb") as file:
+            file.write(image)
+        manifest["snapshots"][name] = {"format": fmt, "figure": digest, "sha256": _sha256(path)}
+    with open(os.path.join(build_dir, "manifest.json"), "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=2)
+
+    pointer_tmp = os.path.join(store_dir, f"CURRENT.{os.getpid()}.tmp")
+    with open(pointer_tmp, "w", encoding="utf-8") as file:
+        file.write(build_name)
+    os.replace(pointer_tmp, os.path.join(store_dir, "CURRENT"))
+
+    _prune_builds(store_dir, keep=build_name)
+    return build_dir
+
+
+def _prune_builds(store_dir: str, keep: str):
+    # Older builds may still be mapped by running replicas; unlinking is safe on POSIX.
+    builds = sorted(
+        (entry for entry in os.scandir(store_dir)
+         if entry.is_dir() and entry.name != keep and os.path.exists(os.path.join(entry.path, "manifest.json"))),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True,
+    )
+    for entry in builds[STORE_KEEP_BUILDS - 1:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def current_build(store_dir: str, version: str = DATA_VERSION):
+    """
+    (build directory, manifest) of the live build, or None when the store is missing,
+    was built for another DATA_VERSION or lacks one of the REQUIRED_ARRAYS.
+    """
+    try:
+        with open(os.path.join(store_dir, "CURRENT"), encoding="utf-8") as file:
+            build_dir = os.path.join(store_dir, file.read().strip())
+        with open(os.path.join(build_dir, "manifest.json"), encoding="utf-8") as file:
+            manifest = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if manifest.get("version") != version or not REQUIRED_ARRAYS <= manifest.get("arrays", {}).keys():
+        return None
+    return build_dir, manifest
+
+
+def verify_build(build_dir: str, manifest: dict, arrays: bool = True, tables=()) -> bool:
+    """
+    True when the build's arrays (and the named tables) match the checksums in its manifest.
+    """
+    files = [(f"{name}.npy", entry) for name, entry in manifest["arrays"].items()] if arrays else []
+    files += [(f"{name}.parquet", manifest["tables"][name]) for name in tables if name in manifest.get("tables", {})]
+    try:
+        return all("sha256" in entry and _sha256(os.path.join(build_dir, filename)) == entry["sha256"]
+                   for filename, entry in files)
+    except OSError:
+        return False
+
+
+def open_store(store_dir: str, version: str = DATA_VERSION):
+    """
+    Memory-map the current build's arrays read-only, or None (see current_build) when the
+    store is missing, stale or fails its checksums.
+    """
+    build = current_build(store_dir, version)
+    if build is None or not verify_build(*build):
+        return None
+    build_dir, manifest = build
+    return {
+        name: np.load(os.path.join(build_dir, f"{name}.npy"), mmap_mode="r", allow_pickle=False)
+        for name in manifest["arrays"]
+    }
+
+
+def store_table_path(store_dir: str, name: str, version: str = DATA_VERSION):
+    """
+    Path of a Parquet snapshot in the live build, or None if the build has no such table
+    or the file fails its checksum.
+    """
+    build = current_build(store_dir, version)
+    if build is None or name not in build[1].get("tables", {}):
+        return None
+    if not verify_build(*build, arrays=False, tables=(name,)):
+        return None
+    return os.path.join(build[0], f"{name}.parquet")
+
+
+def store_quality_report(store_dir: str, version: str = DATA_VERSION):
+    """
+    Validation report saved with the live build, or None (see current_build).
+    """
+    build = current_build(store_dir, version)
+    return None if build is None else build[1].get("quality")
+
+
+def store_summary(store_dir: str, version: str = DATA_VERSION):
+    """
+    Headline numbers saved with the live build (see build_summary), or None. Reads only the
+    manifest, so it is cheap even before the build's checksums have been verified.
+    """
+    build = current_build(store_dir, version)
+    return None if build is None else build[1].get("summary")
+
+
+def store_snapshots(store_dir: str, version: str = DATA_VERSION) -> dict:
+    """
+    {chart name: (format, figure digest, image bytes)} of the lite-mode images saved with the
+    live build; images that fail their checksum are left out. Empty without a live build.
+    """
+    build = current_build(store_dir, version)
+    if build is None:
+        return {}
+    snapshots = {}
+    for name, entry in build[1].get("snapshots", {}).items():
+        try:
+            with open(os.path.join(build[0], f"{name}.{entry['format']}"), "rb") as file:
+                image = file.read()
+        except OSError:
+            continue
+        if hashlib.sha256(image).hexdigest() == entry["sha256"]:
+            snapshots[name] = (entry["format"], entry["figure"], image)
+    return snapshots
+
+
+def render_chart_snapshots(arrays: dict, tables: dict) -> dict:
+    """
+    Lite-mode images of every chart in its default state, for write_store (see
+    figures.render_default_snapshots). Empty when kaleido cannot render here.
+    """
+    from figures import render_default_snapshots   # plotly and kaleido are only needed here
+    casualties = (tables or {}).get("casualties")
+    return render_default_snapshots(arrays, casualties if isinstance(casualties, str) else None)
+
+
+def build_all_aggregates(work_dir: str = None, chunk_rows: int = CHUNK_ROWS):
+    """
+    Fetch and validate every source and compute the full set of aggregates, streaming the
+    casualty lists. Returns (arrays, tables, quality) ready for write_store; the casualty
+    table is the path of a Parquet snapshot written in work_dir (default: the temp dir),
+    where the casualty sources are downloaded to as well.
+    """
+    df_p, df_i = read_population_data(URL_POPULATION_PALESTINE, URL_POPULATION_ISRAEL)
+    handle, snapshot_path = tempfile.mkstemp(prefix="casualties-", suffix=".parquet", dir=work_dir)
+    os.close(handle)
+    try:
+        cost, death_quality = ingest_death_data(CASUALTY_SOURCES, snapshot_path, chunk_rows, work_dir)
+    except BaseException:
+        os.remove(snapshot_path)
+        raise
+    arrays = build_population_aggregates(df_p, df_i)
+    arrays.update(cost)
+    arrays.update(build_per_capita_aggregates(arrays, arrays))
+    return arrays, {"casualties": snapshot_path}, build_quality_report(death_quality, df_p, df_i)
+
+def prewarm_store(store_dir: str, chunk_rows: int = CHUNK_ROWS, wait: bool = True):
+    """
+    Make sure store_dir holds a verified build for DATA_VERSION, building one only if needed.
+    Builders are serialised by a lock file; with wait=False, return None at once when another
+    process is already building. Otherwise returns (build directory, True if it was built now).
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    with open(os.path.join(store_dir, "prewarm.lock"), "w", encoding="utf-8") as lock:
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | (0 if wait else fcntl.LOCK_NB))
+            except BlockingIOError:
+                return None
+        build = current_build(store_dir)
+        if build is not None and verify_build(*build, tables=build[1].get("tables", {})):
+            return build[0], False
+        arrays, tables, quality = build_all_aggregates(work_dir=store_dir, chunk_rows=chunk_rows)
+        snapshots = render_chart_snapshots(arrays, tables)
+        return write_store(store_dir, arrays, tables=tables, quality=quality, snapshots=snapshots), True
+
+# ---------------------------------------------------------------------------
+# 5. COMMAND LINE
+# ---------------------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dashboard data tools.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="fetch the sources and publish a new aggregate store build")
+    prewarm = commands.add_parser("prewarm", help="build the store only if it has no verified build for this "
+                                                  "DATA_VERSION (run from a deploy hook before routing traffic)")
+    for command in (build, prewarm):
+        command.add_argument("--store", default=os.environ.get("DASHBOARD_STORE") or DEFAULT_STORE,
+                             help=f"store directory (default: $DASHBOARD_STORE or {DEFAULT_STORE})")
+        command.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS,
+                             help=f"casualty rows read per chunk; bounds the builder's memory (default: {CHUNK_ROWS:,})")
+    args = parser.parse_args(argv)
+
+    if args.command == "prewarm":
+        build_dir, built = prewarm_store(args.store, chunk_rows=args.chunk_rows)
+        print(f"{'Published' if built else 'Already warm:'} {build_dir}")
+    elif args.command == "build":
+        os.makedirs(args.store, exist_ok=True)
+        arrays, tables, quality = build_all_aggregates(work_dir=args.store, chunk_rows=args.chunk_rows)
+        snapshots = render_chart_snapshots(arrays, tables)
+        build_dir = write_store(args.store, arrays, tables=tables, quality=quality, snapshots=snapshots)
+        print(f"Rendered {len(snapshots)} lite-mode chart snapshot(s)")
+        flagged = sum(check["Rows"] for check in quality["checks"])
+        print(f"Validated {quality['rows_read']:,} casualty rows ({quality['rows_kept']:,} kept, {flagged:,} flags)")
+        print(f"Published {build_dir}")
+
+
+if __name__ == "__main__":
+    main()
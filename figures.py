@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+"""
+Plotly figures of the Population and Cost pages, built from the aggregate arrays.
+
+The pages call these with their widget values. The store builder calls them through
+default_figures() with every widget at its default, and render_default_snapshots()
+saves lite-mode images of the results in the build (see data.write_store). A page
+whose figure is identical to the stored one then shows the stored image instead of
+rendering it again. No streamlit here, so the builder can run on its own.
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from charts import (
+    TEMPLATE_NAME, register_dashboard_template, slim_figure, figure_digest, render_static, static_rendering_available,
+)
+from data import COUNTRIES, SIDES, GENDERS, MONTHS, AGE_STARTS, DEATH_WINDOW, read_gazetteer, rebin_ages, age_bracket_labels
+
+# Global color palette
+COLOR_PRIMARY = "#2B2D42"   # dark navy
+COLOR_ACCENT  = "#E5C056"   # golden yellow
+
+# Shared Plotly look (white plot area, black text, light grid), see charts.py. Plotly Express
+# calls name the template: Streamlit makes its own the default when it loads its Plotly
+# support, and the colours it picks would then depend on import order.
+register_dashboard_template(accent=COLOR_ACCENT, primary=COLOR_PRIMARY)
+
+# Widget defaults of the charts that have widgets; the pages use them as the initial values
+DEATHS_SCALES      = ("Number of Deaths", "Deaths per 100k Residents")
+EXPLORE_GROUP_BY   = "Citizenship"
+EXPLORE_GRAIN      = "Year"
+EXPLORE_MAX_GROUPS = 12
+
+
+def cost_window(cost: dict):
+    """
+    (years, deaths per side/year/month, mask on cost.years) within DEATH_WINDOW.
+    """
+    years = np.asarray(cost["cost.years"])
+    in_window = (years >= DEATH_WINDOW[0]) & (years <= DEATH_WINDOW[1])
+    return years[in_window], np.asarray(cost["cost.deaths"])[:, in_window, :], in_window
+
+
+def _dense_traces(fig, years, values, observed, name, color):
+    # Solid where interpolated from published figures, dashed where projected past the
+    # last published year
+    last = int(np.flatnonzero(observed)[-1])
+    fig.add_trace(go.Scatter(
+        x=years[:last + 1], y=values[:last + 1], mode="lines",
+        name=name, legendgroup=name, line=dict(color=color, width=2.5)
+    ))
+    if last + 1 < len(years):
+        fig.add_trace(go.Scatter(
+            x=years[last:], y=values[last:], mode="lines",
+            name=f"{name} (projected)", legendgroup=name, showlegend=False,
+            line=dict(color=color, width=2.5, dash="dash")
+        ))
+    return fig
+
+
+def population_trend_figure(population: dict) -> go.Figure:
+    years    = np.asarray(population["population.dense.years"])
+    value    = np.asarray(population["population.dense.value"])
+    observed = np.asarray(population["population.dense.observed"])
+    PAL, ISR = COUNTRIES.index("Palestine"), COUNTRIES.index("Israel")
+    fig = go.Figure()
+    _dense_traces(fig, years, value[PAL], observed[PAL], "Palestine", COLOR_ACCENT)
+    _dense_traces(fig, years, value[ISR], observed[ISR], "Israel", COLOR_PRIMARY)
+    fig.update_layout(xaxis_title_text="Year", yaxis_title_text="Population")
+    return fig
+
+
+def population_growth_figure(population: dict, country: str) -> go.Figure:
+    row = COUNTRIES.index(country)
+    color = COLOR_ACCENT if country == "Palestine" else COLOR_PRIMARY
+    fig = _dense_traces(go.Figure(), np.asarray(population["population.dense.years"]),
+                        np.asarray(population["population.dense.change"])[row],
+                        np.asarray(population["population.dense.observed"])[row], country, color)
+    fig.update_layout(showlegend=False, xaxis_title_text="Year", yaxis_title_text="Growth Rate (%)")
+    return fig
+
+
+def deaths_per_year_figure(years, counts, scale: str = DEATHS_SCALES[0]) -> go.Figure:
+    """
+    Yearly deaths per side; counts is (side, year) in the unit named by scale.
+    """
+    ISR, PAL = SIDES.index("Israeli"), SIDES.index("Palestinian")
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=years,
+        y=counts[PAL],
+        mode="lines+markers",
+        name="Palestinian",
+        line=dict(color=COLOR_ACCENT, width=2.5),
+        marker=dict(size=6)
+    ))
+    fig.add_trace(go.Scatter(
+        x=years,
+        y=counts[ISR],
+        mode="lines+markers",
+        name="Israeli",
+        line=dict(color=COLOR_PRIMARY, width=2.5),
+        marker=dict(size=6)
+    ))
+    fig.update_layout(xaxis_title_text="Year", yaxis_title_text=scale)
+    return fig
+
+
+def cost_heatmap_figure(years, deaths) -> go.Figure:
+    """
+    Month × year heatmap of one side's (year, month) death counts.
+    """
+    fig = px.imshow(
+        pd.DataFrame(np.asarray(deaths).T, index=list(MONTHS), columns=years),
+        aspect="auto",
+        color_continuous_scale=["#FFFFFF", COLOR_ACCENT, COLOR_PRIMARY],
+        labels=dict(x="Year", y="Month", color="Number of Deaths"),
+        template=TEMPLATE_NAME,
+    )
+    fig.update_layout(coloraxis_showscale=True, margin=dict(t=20, b=20, l=20, r=20))
+    return fig
+
+
+def cost_gender_figure(totals) -> go.Figure:
+    """
+    Donut of one side's deaths per gender (GENDERS order), largest slice first.
+    """
+    totals = pd.Series(totals, index=list(GENDERS)).sort_values(ascending=False)
+    fig = go.Figure(data=[go.Pie(
+        labels=totals.index,
+        values=totals.values,
+        marker_colors=[COLOR_PRIMARY, COLOR_ACCENT],
+        hole=0.4,
+        textinfo="percent+label"
+    )])
+    fig.update_layout(margin=dict(t=20, b=20, l=20, r=20), showlegend=True)
+    return fig
+
+
+def age_bar_figure(labels, totals) -> go.Figure:
+    """
+    Grouped bars of one side's (age bracket, gender) death counts.
+    """
+    fig = go.Figure([
+        go.Bar(x=labels, y=totals[:, g], name=gender,
+               marker_color=COLOR_ACCENT if gender == "Female" else COLOR_PRIMARY)
+        for g, gender in enumerate(GENDERS)
+    ])
+    fig.update_layout(
+        barmode="group",
+        xaxis=dict(title_text="Age Group", showgrid=False, type="category"),
+        yaxis=dict(title_text="Number of Deaths", showgrid=False),
+        margin=dict(t=40, b=20, l=20, r=20),
+        showlegend=True
+    )
+    return fig
+
+
+def age_pyramid_figure(labels, totals) -> go.Figure:
+    """
+    Population pyramid of one side's (age bracket, gender) death counts.
+    """
+    # Men to the left (negative), women to the right; ticks are labelled with absolute counts
+    female, male = totals[:, GENDERS.index("Female")], totals[:, GENDERS.index("Male")]
+    fig = go.Figure([
+        go.Bar(y=labels, x=-male, customdata=male, name="Male", orientation="h",
+               marker_color=COLOR_PRIMARY, hovertemplate="%{y}: %{customdata:,}<extra>Male</extra>"),
+        go.Bar(y=labels, x=female, customdata=female, name="Female", orientation="h",
+               marker_color=COLOR_ACCENT, hovertemplate="%{y}: %{customdata:,}<extra>Female</extra>"),
+    ])
+    largest = max(int(totals.max()), 1)
+    ticks = np.linspace(-largest, largest, 5).round().astype(int)
+    fig.update_layout(
+        barmode="relative",
+        bargap=0.05,
+        xaxis=dict(title_text="Number of Deaths", tickvals=ticks, ticktext=[f"{abs(t):,}" for t in ticks]),
+        yaxis=dict(title_text="Age", type="category", showgrid=False),
+        margin=dict(t=40, b=20, l=20, r=20),
+        height=max(400, 14 * len(labels)),
+    )
+    return fig
+
+
+def casualty_map_figure(counts) -> go.Figure:
+    """
+    Circles on the gazetteer bins sized by deaths; counts is (side, bin).
+    """
+    gazetteer = read_gazetteer()
+    labels = np.where(gazetteer["kind"] == "region", gazetteer["name"] + " (district unknown)", gazetteer["name"])
+    largest = max(int(counts.max()), 1)
+    fig = go.Figure()
+    for side, color in (("Palestinian", COLOR_ACCENT), ("Israeli", COLOR_PRIMARY)):
+        row = counts[SIDES.index(side)]
+        shown = row > 0
+        fig.add_trace(go.Scattermap(
+            lat=gazetteer["lat"].to_numpy()[shown],
+            lon=gazetteer["lon"].to_numpy()[shown],
+            text=labels[shown],
+            customdata=row[shown],
+            mode="markers",
+            name=side,
+            marker=dict(size=8 + 42 * np.sqrt(row[shown] / largest), color=color, opacity=0.75),
+            hovertemplate="%{text}<br>%{customdata:,} deaths<extra>" + side + "</extra>",
+        ))
+    fig.update_layout(
+        map=dict(style="carto-positron", center=dict(lat=31.75, lon=35.0), zoom=6.8),
+        margin=dict(t=0, b=0, l=0, r=0),
+        height=560,
+    )
+    return fig
+
+
+def explore_figure(result: pd.DataFrame, group_by: str = None, grain: str = None):
+    """
+    Chart of a query.run_query result, or None when it is a single total.
+    """
+    # Keep the chart readable: plot the largest groups, the page's table has all of them
+    plotted = result
+    if group_by is not None:
+        top_groups = result.groupby(group_by, dropna=False)["Deaths"].sum().nlargest(EXPLORE_MAX_GROUPS).index
+        plotted = result[result[group_by].isin(top_groups)]
+
+    if grain is not None:
+        # Periods as epoch milliseconds on a date axis: sent base64-encoded like every other
+        # array instead of one date string per point and group
+        plotted = plotted.assign(Period=pd.to_datetime(plotted["Period"]).astype("datetime64[ms]").astype("int64"))
+        fig = px.line(plotted, x="Period", y="Deaths", color=group_by, markers=True, template=TEMPLATE_NAME)
+        fig.update_xaxes(type="date", hoverformat="%Y-%m-%d")
+    elif group_by is not None:
+        fig = px.bar(plotted.sort_values("Deaths", ascending=False), x=group_by, y="Deaths",
+                     color_discrete_sequence=[COLOR_ACCENT], template=TEMPLATE_NAME)
+    else:
+        return None
+    fig.update_layout(yaxis_title_text="Number of Deaths", margin=dict(t=20, b=20, l=20, r=20))
+    return fig
+
+
+def default_figures(arrays: dict, casualty_path: str = None) -> dict:
+    """
+    {chart name: figure} of every chart as the pages first draw it, from a full set of
+    aggregate arrays and, for the query builder's chart, the Parquet snapshot of the rows.
+    """
+    ISR, PAL = SIDES.index("Israeli"), SIDES.index("Palestinian")
+    years_window, deaths_window, _ = cost_window(arrays)
+    gender = np.asarray(arrays["cost.gender"]).sum(axis=1)
+    age = rebin_ages(np.asarray(arrays["cost.age_years"]).sum(axis=1), AGE_STARTS, axis=1)
+    labels = age_bracket_labels(AGE_STARTS)
+    figures = {
+        "population_trend": population_trend_figure(arrays),
+        "population_growth_palestine": population_growth_figure(arrays, "Palestine"),
+        "population_growth_israel": population_growth_figure(arrays, "Israel"),
+        "cost_deaths_per_year": deaths_per_year_figure(years_window, deaths_window.sum(axis=2)),
+        "cost_heatmap_israeli": cost_heatmap_figure(years_window, deaths_window[ISR]),
+        "cost_heatmap_palestinian": cost_heatmap_figure(years_window, deaths_window[PAL]),
+        "cost_gender_israeli": cost_gender_figure(gender[ISR]),
+        "cost_gender_palestinian": cost_gender_figure(gender[PAL]),
+        "cost_age_israeli": age_bar_figure(labels, age[ISR]),
+        "cost_age_palestinian": age_bar_figure(labels, age[PAL]),
+        "cost_map": casualty_map_figure(np.asarray(arrays["cost.district"]).sum(axis=1)),
+    }
+    if casualty_path is not None:
+        import query   # duckdb is only needed for the query builder's chart
+        con = query.connect(parquet_path=casualty_path)
+        try:
+            group_by = EXPLORE_GROUP_BY if EXPLORE_GROUP_BY in query.available_fields(con) else None
+            start, end = query.date_range(con)
+            grain = query.TIME_GRAINS[EXPLORE_GRAIN]
+            result = query.run_query(con, group_by=group_by, grain=grain, start=start, end=end)
+        finally:
+            con.close()
+        if not result.empty and result["Deaths"].sum() > 0:
+            figure = explore_figure(result, group_by, grain)
+            if figure is not None:
+                figures["cost_explore"] = figure
+    return figures
+
+
+def render_default_snapshots(arrays: dict, casualty_path: str = None) -> dict:
+    """
+    {chart name: (format, figure digest, image bytes)} of the default figures, for
+    data.write_store. Empty when kaleido is not installed; charts it cannot render are
+    left out and rendered by the app on demand instead.
+    """
+    if not static_rendering_available():
+        return {}
+    snapshots = {}
+    for name, fig in default_figures(arrays, casualty_path).items():
+        figure = slim_figure(fig)
+        try:
+            fmt, image = render_static(figure, name)
+        except Exception as error:   # kaleido reports a missing browser or renderer in several ways
+            logging.getLogger(__name__).warning("Static rendering of '%s' failed: %s", name, error)
+            continue
+        snapshots[name] = (fmt, figure_digest(figure), image)
+    return snapshots
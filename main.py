@@ -1,16 +1,49 @@
 # -*- coding: utf-8 -*-
 import streamlit as st
+import streamlit.components.v1 as components
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import seaborn as sns
 import matplotlib.pyplot as plt
-from matplotlib.colors import LinearSegmentedColormap
 import base64
+import os
+import functools
+import threading
+import tempfile
+import atexit
+import shutil
+import time
 from PIL import Image
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from streamlit.runtime.caching.cache_data_api import get_data_cache_stats_provider
+from streamlit.runtime.stats import CACHE_MEMORY_FAMILY
 import io
+import logging
+import concurrent.futures
+
+from data import (
+    DATA_VERSION, URL_POPULATION_PALESTINE, URL_POPULATION_ISRAEL, CASUALTY_SOURCES,
+    COUNTRIES, SIDES, AGE_STARTS, AGE_MAX,
+    read_population_data, ingest_death_data, build_population_aggregates,
+    build_per_capita_aggregates, build_quality_report, build_summary, compare_year_options,
+    open_store, store_table_path, store_quality_report, store_summary, store_snapshots, prewarm_store, DEFAULT_STORE,
+    age_bracket_labels, rebin_ages,
+)
+import query
+import metrics
+from crossfilter import render_crossfilter_html
+from projection import value_at
+from validation import report_frame
+from charts import (
+    FigureBudgetError, slim_figure, figure_bytes, figure_digest, check_budget,
+    render_static, static_rendering_available,
+)
+from figures import (
+    COLOR_PRIMARY, COLOR_ACCENT, DEATHS_SCALES, EXPLORE_GROUP_BY, EXPLORE_GRAIN, cost_window,
+    population_trend_figure, population_growth_figure, deaths_per_year_figure, cost_heatmap_figure,
+    cost_gender_figure, age_bar_figure, age_pyramid_figure, casualty_map_figure, explore_figure,
+)
 
 # ---------------------------------------------------------------------------
 # 1. PAGE CONFIGURATION & BACKGROUND
@@ -24,14 +57,12 @@ st.set_page_config(
 )
 
 # Function to embed background image (bg.png) via base64
-def set_background(png_path: str):
-    """
-    Load image from assets/bg.png and embed it as CSS background full-screen.
-    """
+@st.cache_resource
+def _background_css(png_path: str) -> str:
     with open(png_path, "rb") as file:
         data = file.read()
     b64 = base64.b64encode(data).decode()
-    css = f"""
+    return f"""
     <style>
     .stApp {{
         background-image: url("data:image/png;base64,{b64}");
@@ -41,7 +72,16 @@ def set_background(png_path: str):
     }}
     </style>
     """
-    st.markdown(css, unsafe_allow_html=True)
+
+
+def set_background(png_path: str):
+    """
+    Load image from assets/bg.png and embed it as CSS background full-screen.
+    The encoded CSS is built once per process. Without the image the default background stays.
+    """
+    if not os.path.exists(png_path):
+        return
+    st.markdown(_background_css(png_path), unsafe_allow_html=True)
 
 set_background("assets/bg.png")
 
@@ -108,6 +148,19 @@ h3 {
     border-top: 1px solid rgba(229, 192, 86, 0.3);
 }
 
+/* Placeholder boxes shown while a section's data loads */
+.skeleton {
+    background: linear-gradient(90deg, rgba(43, 45, 66, 0.6) 25%, rgba(229, 192, 86, 0.15) 50%, rgba(43, 45, 66, 0.6) 75%);
+    background-size: 200% 100%;
+    animation: skeleton-shimmer 1.4s ease-in-out infinite;
+    border-radius: 8px;
+    margin: 0.5rem 0;
+}
+@keyframes skeleton-shimmer {
+    from { background-position: 200% 0; }
+    to   { background-position: -200% 0; }
+}
+
 /* Hide default Streamlit menu & footer if desired */
 # MainMenu {visibility: hidden;}
 footer {visibility: hidden;}
@@ -115,11 +168,107 @@ footer {visibility: hidden;}
 """
 st.markdown(FONT_CSS, unsafe_allow_html=True)
 
-# Global color palette
-COLOR_PRIMARY = "#2B2D42"   # dark navy
-COLOR_ACCENT  = "#E5C056"   # golden yellow
+# Global color palette (COLOR_PRIMARY and COLOR_ACCENT come with the chart look, see figures.py)
 COLOR_WHITE   = "#FFFFFF"
 
+# Fail on oversized charts instead of logging a warning (set in CI)
+STRICT_FIGURE_BUDGETS = bool(os.environ.get("DASHBOARD_STRICT_BUDGETS"))
+
+
+@st.cache_resource
+def _figure_stats():
+    return {"lock": threading.Lock(), "sizes": {}}
+
+
+# Lite mode: static chart snapshots instead of interactive Plotly figures, so phones and
+# slow connections never load plotly.js. Switched on by default for mobile browsers and
+# for clients that send "Save-Data: on"; the toggle in the menu bar overrides it.
+def _client_prefers_lite() -> bool:
+    headers = st.context.headers
+    if headers.get("Save-Data", "").strip().lower() == "on":
+        return True
+    user_agent = headers.get("User-Agent", "")
+    return any(token in user_agent for token in ("Mobi", "Android", "iPhone", "iPad"))
+
+
+def lite_mode() -> bool:
+    return bool(st.session_state.get("lite_mode", False))
+
+
+# Snapshots depend only on the figure, which depends only on the data version and the
+# widget state. Every chart's default state is rendered by the store builder (see
+# figures.render_default_snapshots); other states are rendered here on first use and
+# shared by every session.
+@st.cache_resource(show_spinner=False, ttl="5m")
+def _stored_snapshots(store_dir: str, version: str) -> dict:
+    return store_snapshots(store_dir, version)
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _static_chart(version: str, name: str, figure: dict):
+    try:
+        return render_static(figure, name)
+    except Exception as error:   # kaleido reports a missing browser or renderer in several ways
+        logging.getLogger(__name__).warning("Static rendering of '%s' failed: %s", name, error)
+        return None
+
+
+def _chart_snapshot(name: str, figure: dict):
+    """
+    (format, bytes) of a static image of the figure: the store's copy when the figure is the
+    one the builder rendered, else rendered here; None when kaleido cannot render it.
+    """
+    stored = _stored_snapshots(AGGREGATE_STORE, DATA_VERSION).get(name) if AGGREGATE_STORE else None
+    if stored is not None and stored[1] == figure_digest(figure):
+        return stored[0], stored[2]
+    return _static_chart(DATA_VERSION, name, figure) if static_rendering_available() else None
+
+
+def show_chart(fig, name: str):
+    """
+    Slim a figure, check its payload against the chart budget and render it
+    (as a static image in lite mode, when one is stored or kaleido can render it).
+    """
+    figure = slim_figure(fig)
+    size = figure_bytes(figure)
+    try:
+        check_budget(name, size)
+    except FigureBudgetError as error:
+        if STRICT_FIGURE_BUDGETS:
+            raise
+        logging.getLogger(__name__).warning(str(error))
+
+    snapshot = _chart_snapshot(name, figure) if lite_mode() else None
+    stats = _figure_stats()
+    with stats["lock"]:
+        stats["sizes"][name] = size if snapshot is None else len(snapshot[1])
+    if snapshot is None:
+        st.plotly_chart(figure, use_container_width=True, theme=None)
+    elif snapshot[0] == "svg":
+        st.image(snapshot[1].decode("utf-8"), use_container_width=True)
+    else:
+        st.image(snapshot[1], use_container_width=True)
+
+
+def show_placeholder(height: int):
+    """
+    Shimmering box that holds a section's place until its data has loaded.
+    """
+    st.markdown(f"<div class='skeleton' style='height:{height}px;'></div>", unsafe_allow_html=True)
+
+
+def get_figure_stats() -> pd.DataFrame:
+    """
+    Last serialized payload size of every chart rendered by this worker process.
+    """
+    stats = _figure_stats()
+    with stats["lock"]:
+        sizes = dict(stats["sizes"])
+    return pd.DataFrame(
+        [(name, f"{size / 1024:.1f}") for name, size in sorted(sizes.items())],
+        columns=["Chart", "KB sent"],
+    )
+
 # ---------------------------------------------------------------------------
 # 3. HORIZONTAL NAVIGATION (top menu bar)
 # ---------------------------------------------------------------------------
@@ -248,28 +397,421 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-menu = st.radio(
-    "",
-    ("Changing Borders", "The Population", "The Cost", "Data Sources"),
-    horizontal=True,
-    index=0,
-    label_visibility="collapsed",
-    key="main_navigation"
-)
+# The menu radio and the closing tags are rendered by show_app() (section 6),
+# so that switching pages does not re-send the styles above.
 
-st.markdown(
+# ---------------------------------------------------------------------------
+# 4. DATA LOADERS (module-level cache)
+# ---------------------------------------------------------------------------
+
+# Cache keys always include DATA_VERSION (see data.py), so bumping it retires old entries.
+CACHE_TTL = "12h"
+CACHE_MAX_ENTRIES = 2
+
+# Persistent aggregate store written by `python data.py prewarm` / `build`. When it holds a
+# verified build for DATA_VERSION, workers memory-map it instead of fetching and aggregating
+# the CSVs. Defaults to a per-user cache directory; set DASHBOARD_STORE="" to disable it.
+AGGREGATE_STORE = os.environ.get("DASHBOARD_STORE", DEFAULT_STORE)
+
+
+@st.cache_resource(show_spinner=False)   # first reached from a loader thread, which has no page to draw on
+def _cache_stats():
     """
-      </div>
-    </div>
-    """,
-    unsafe_allow_html=True
-)
+    Process-wide hit/miss counters for the cached loaders, shared by all sessions.
+    """
+    return {"lock": threading.Lock(), "loaders": {}}
+
+
+def _record_cache_call(name: str, miss: bool = False):
+    stats = _cache_stats()
+    with stats["lock"]:
+        entry = stats["loaders"].setdefault(name, {"calls": 0, "misses": 0})
+        if miss:
+            entry["misses"] += 1
+        else:
+            entry["calls"] += 1
+
+
+# Loader name -> the st.cache_data function holding its results
+LOADER_CACHES = {
+    "casualties": "_load_casualties",
+    "load_population_data": "_load_population_data",
+    "population_aggregates": "_compute_population_aggregates",
+    "per_capita_aggregates": "_compute_per_capita_aggregates",
+}
+
+
+def _cache_bytes() -> dict:
+    """
+    Bytes held right now by each st.cache_data function, by function name. Streamlit's own
+    per-entry sizes, so expired and evicted entries are already gone from them.
+    """
+    held = {}
+    for stat in get_data_cache_stats_provider().get_stats().get(CACHE_MEMORY_FAMILY, []):
+        name = stat.cache_name.rsplit(".", 1)[-1]
+        held[name] = held.get(name, 0) + stat.byte_length
+    return held
+
+
+def get_cache_stats() -> pd.DataFrame:
+    """
+    Snapshot of the loader cache counters as a table (one row per loader).
+    """
+    stats = _cache_stats()
+    held = _cache_bytes()
+    rows = []
+    with stats["lock"]:
+        for name, entry in stats["loaders"].items():
+            rows.append({
+                "Loader": name,
+                "Hits": entry["calls"] - entry["misses"],
+                "Misses": entry["misses"],
+                "MB held": held.get(LOADER_CACHES.get(name), 0) / 1e6,
+            })
+    return pd.DataFrame(rows, columns=["Loader", "Hits", "Misses", "MB held"])
+
+
+# Per-page / per-session CPU and memory accounting (see metrics.py). The Prometheus
+# endpoint and the log lines are opt-in; tracemalloc slows every allocation.
+METRICS_PORT = os.environ.get("DASHBOARD_METRICS_PORT")
+METRICS_LOG  = bool(os.environ.get("DASHBOARD_METRICS_LOG"))
+TRACEMALLOC  = bool(os.environ.get("DASHBOARD_TRACEMALLOC"))
+
+
+@st.cache_resource
+def _usage_registry():
+    registry = metrics.new_registry(log_runs=METRICS_LOG)
+    if METRICS_LOG and not metrics.logger.handlers:
+        metrics.logger.addHandler(logging.StreamHandler())
+        metrics.logger.setLevel(logging.INFO)
+    if TRACEMALLOC:
+        metrics.start_tracemalloc()
+    if METRICS_PORT:
+        try:
+            metrics.serve_metrics(registry, int(METRICS_PORT))
+        except OSError as error:   # another worker on this host already holds the port
+            logging.getLogger(__name__).warning("Metrics endpoint not started on port %s: %s", METRICS_PORT, error)
+    return registry
+
+
+def metered(page: str):
+    """
+    Record each call of the decorated page or fragment as one run for the current session.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            ctx = get_script_run_ctx()
+            with metrics.measure_run(_usage_registry(), page, ctx.session_id if ctx else None):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def get_usage_stats() -> pd.DataFrame:
+    """
+    Per-page resource usage of this worker process as a table.
+    """
+    pages = metrics.snapshot(_usage_registry())["pages"]
+    rows = [{
+        "Page": page,
+        "Runs": entry["runs"],
+        "CPU ms / run": entry["cpu"] * 1e3 / entry["runs"],
+        "Wall ms / run": entry["wall"] * 1e3 / entry["runs"],
+        "Max RSS growth MB": entry["rss_delta_max"] / 1e6,
+        "Max alloc peak MB": entry["alloc_peak_max"] / 1e6,
+    } for page, entry in sorted(pages.items()) if entry["runs"]]   # a loader may report before its page's first run ends
+    return pd.DataFrame(rows, columns=["Page", "Runs", "CPU ms / run", "Wall ms / run",
+                                       "Max RSS growth MB", "Max alloc peak MB"])
+
+
+@st.cache_data(show_spinner=False, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES)
+def _load_population_data(version: str, url_palestine: str, url_israel: str):
+    df_p, df_i = read_population_data(url_palestine, url_israel)
+    _record_cache_call("load_population_data", miss=True)
+    return df_p, df_i
+
+
+# Without a warm store the casualty sources are streamed exactly as the store builder does
+# (data.ingest_death_data over CASUALTY_SOURCES), so the numbers never depend on whether the
+# store is used and memory stays bounded by one chunk. The downloads and the cleaned rows go
+# to a per-process work directory, removed when the process exits; the query builder reads
+# the Parquet snapshot there in place.
+@st.cache_resource(show_spinner=False)
+def _casualty_work_dir() -> str:
+    work_dir = tempfile.mkdtemp(prefix=f"dashboard-casualties-{os.getpid()}-")
+    atexit.register(shutil.rmtree, work_dir, ignore_errors=True)
+    return work_dir
+
+
+@st.cache_data(show_spinner=False, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES)
+def _load_casualties(version: str, sources: tuple):
+    work_dir = _casualty_work_dir()
+    snapshot_path = os.path.join(work_dir, f"casualties-{version}.parquet")
+    handle, partial_path = tempfile.mkstemp(prefix="casualties-", suffix=".parquet", dir=work_dir)
+    os.close(handle)
+    try:
+        cost, quality = ingest_death_data(sources, partial_path, work_dir=work_dir)
+    except BaseException:
+        os.remove(partial_path)
+        raise
+    os.replace(partial_path, snapshot_path)   # open query views keep reading a complete file
+    _record_cache_call("casualties", miss=True)
+    return {"cost": cost, "quality": quality, "snapshot": snapshot_path}
+
+
+def load_population_data():
+    _record_cache_call("load_population_data")
+    return _load_population_data(DATA_VERSION, URL_POPULATION_PALESTINE, URL_POPULATION_ISRAEL)
+
+
+def load_casualties() -> dict:
+    """
+    {"cost": count cubes, "quality": casualty validation report, "snapshot": Parquet path}
+    for the casualty sources, used when the shared store is cold or disabled.
+    """
+    _record_cache_call("casualties")
+    return _load_casualties(DATA_VERSION, CASUALTY_SOURCES)
+
+
+# cache_resource, not cache_data: the mapped arrays are shared as-is instead of
+# being copied into every session. The short TTL picks up newly published builds.
+@st.cache_resource(show_spinner=False, ttl="5m")
+def _open_aggregate_store(store_dir: str, version: str):
+    return open_store(store_dir, version)
+
+
+# A worker that finds the store cold fills it from a background thread (at most one per
+# process, and one per store thanks to the prewarm lock), so the next restart starts warm.
+# Meanwhile its loaders wait for that build instead of fetching the same sources again,
+# and only load them in-process when it fails or is still running PREWARM_WAIT_SECONDS
+# after it started (the wait is shared by all calls, not restarted by each of them).
+# A store that is still cold (e.g. the build hit a network error) is rebuilt at most once
+# per PREWARM_RETRY_SECONDS.
+PREWARM_WAIT_SECONDS  = 120
+PREWARM_RETRY_SECONDS = 300
+
+
+@st.cache_resource(show_spinner=False)
+def _prewarm_runs():
+    return {"lock": threading.Lock(), "runs": {}}
+
+
+def _background_prewarm(store_dir: str, version: str) -> dict:
+    """
+    The prewarm run for this store and version: {"thread", "ok", "finished", "deadline"},
+    where ok is None while it runs and loaders stop waiting for it at deadline. Starts a
+    new one unless one is running or finished recently.
+    """
+    runs = _prewarm_runs()
+    with runs["lock"]:
+        run = runs["runs"].get((store_dir, version))
+        if run is not None and (run["ok"] is None or time.time() - run["finished"] < PREWARM_RETRY_SECONDS):
+            return run
+        run = {"ok": None, "finished": None, "deadline": time.time() + PREWARM_WAIT_SECONDS}
+
+        def prewarm():
+            ok = False
+            try:
+                # Waits for a build another process is already producing, then reuses it
+                prewarm_store(store_dir, wait=True)
+                ok = True
+            except Exception:
+                logging.getLogger(__name__).exception("Prewarming the aggregate store in %s failed", store_dir)
+            if ok:
+                for cached in (_open_aggregate_store, _stored_quality_report, _stored_summary, _stored_casualty_db,
+                               _stored_snapshots):
+                    cached.clear()   # pick up the new build on the next call
+            run["finished"] = time.time()
+            run["ok"] = ok
+
+        run["thread"] = threading.Thread(target=prewarm, name="dashboard-prewarm", daemon=True)
+        runs["runs"][(store_dir, version)] = run
+        run["thread"].start()
+        return run
+
+
+def _stored_aggregates():
+    if not AGGREGATE_STORE:
+        return None
+    stored = _open_aggregate_store(AGGREGATE_STORE, DATA_VERSION)
+    if stored is None:
+        run = _background_prewarm(AGGREGATE_STORE, DATA_VERSION)
+        run["thread"].join(max(0.0, run["deadline"] - time.time()))
+        if run["ok"]:
+            stored = _open_aggregate_store(AGGREGATE_STORE, DATA_VERSION)
+    return stored
+
+
+@st.cache_data(show_spinner=False, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES)
+def _compute_population_aggregates(version: str):
+    arrays = build_population_aggregates(*load_population_data())
+    _record_cache_call("population_aggregates", miss=True)
+    return arrays
+
+
+@st.cache_data(show_spinner=False, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES)
+def _compute_per_capita_aggregates(version: str):
+    arrays = build_per_capita_aggregates(load_population_aggregates(), load_cost_aggregates())
+    _record_cache_call("per_capita_aggregates", miss=True)
+    return arrays
+
+
+def load_population_aggregates() -> dict:
+    """
+    Population arrays (see data.build_population_aggregates), from the shared store if available.
+    """
+    stored = _stored_aggregates()
+    if stored is not None:
+        return stored
+    _record_cache_call("population_aggregates")
+    return _compute_population_aggregates(DATA_VERSION)
+
+
+def load_cost_aggregates() -> dict:
+    """
+    Casualty count cubes (see data.build_cost_aggregates), from the shared store if available.
+    """
+    stored = _stored_aggregates()
+    if stored is not None:
+        return stored
+    return load_casualties()["cost"]
+
+
+def load_per_capita_aggregates() -> dict:
+    """
+    Deaths per 100k residents (see data.build_per_capita_aggregates), from the shared store if available.
+    """
+    stored = _stored_aggregates()
+    if stored is not None:
+        return stored
+    _record_cache_call("per_capita_aggregates")
+    return _compute_per_capita_aggregates(DATA_VERSION)
+
+
+@st.cache_resource(show_spinner=False, ttl="5m")
+def _stored_quality_report(store_dir: str, version: str):
+    return store_quality_report(store_dir, version)
+
+
+@st.cache_data(show_spinner=False, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES)
+def _compute_quality_report(version: str):
+    # The casualty checks ran on the raw chunks inside the cached casualty load
+    return build_quality_report(load_casualties()["quality"], *load_population_data())
+
+
+def load_quality_report() -> dict:
+    """
+    Validation report of the sources (see validation.py), saved with the shared store build
+    or computed alongside the cached loaders.
+    """
+    if AGGREGATE_STORE and _stored_aggregates() is not None:
+        stored = _stored_quality_report(AGGREGATE_STORE, DATA_VERSION)
+        if stored is not None:
+            return stored
+    return _compute_quality_report(DATA_VERSION)
+
+
+@st.cache_resource(show_spinner=False, ttl="5m")
+def _stored_summary(store_dir: str, version: str):
+    return store_summary(store_dir, version)
+
+
+def load_summary() -> dict:
+    """
+    Headline numbers of the live store build (see data.build_summary); empty when the store is
+    cold or disabled, in which case the pages show placeholders until their data arrives.
+    """
+    if not AGGREGATE_STORE:
+        return {}
+    return _stored_summary(AGGREGATE_STORE, DATA_VERSION) or {}
+
+
+# The pages run their loaders on a shared pool, so the layout and headline numbers are sent
+# before the slowest dataset arrives and each section fills in as soon as its own data is
+# ready. A load already in flight for another session is joined, not started again; finished
+# results live in the loaders' own caches, never in the pool.
+LOADER_THREADS = 4
+
+
+@st.cache_resource
+def _loader_pool():
+    return {
+        "executor": concurrent.futures.ThreadPoolExecutor(LOADER_THREADS, thread_name_prefix="dashboard-loader"),
+        "lock": threading.RLock(),
+        "pending": {},
+    }
+
+
+def load_in_background(loader) -> concurrent.futures.Future:
+    """
+    Future for `loader()` (e.g. load_cost_aggregates) run on the shared loader pool. Its CPU
+    time is charged to the page and session that started it (see metrics.measure_background).
+    """
+    pool = _loader_pool()
+    run = metrics.current_run()
+
+    def measured():
+        with metrics.measure_background(_usage_registry(), run):
+            return loader()
+
+    key = (loader.__name__, DATA_VERSION)
+    with pool["lock"]:
+        future = pool["pending"].get(key)
+        if future is None:
+            future = pool["executor"].submit(measured)
+            pool["pending"][key] = future
+
+            def done(finished):
+                with pool["lock"]:
+                    if pool["pending"].get(key) is finished:
+                        del pool["pending"][key]
+            future.add_done_callback(done)
+    return future
+
+# One DuckDB database per process for the Cost page query builder; queries run on
+# per-call cursors, so sessions can share it. The store's database is only a view over
+# the build's Parquet file, so it is re-resolved as often as the mapped arrays: a build
+# is pruned only after two newer ones, long after every worker has moved on.
+@st.cache_resource(show_spinner=False, ttl="5m")
+def _stored_casualty_db(store_dir: str, version: str):
+    parquet_path = store_table_path(store_dir, "casualties", version)
+    return None if parquet_path is None else query.connect(parquet_path=parquet_path)
+
+
+@st.cache_resource(show_spinner=False, ttl=CACHE_TTL)
+def _casualty_db(version: str):
+    return query.connect(parquet_path=load_casualties()["snapshot"])
+
+
+def load_casualty_db():
+    if AGGREGATE_STORE and _stored_aggregates() is not None:
+        stored = _stored_casualty_db(AGGREGATE_STORE, DATA_VERSION)
+        if stored is not None:
+            return stored
+    return _casualty_db(DATA_VERSION)
+
+
+@st.cache_data(show_spinner=False, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES)
+def _crossfilter_html(version: str) -> str:
+    return render_crossfilter_html(load_cost_aggregates(), accent=COLOR_ACCENT, primary=COLOR_PRIMARY)
+
+
+def load_crossfilter_html() -> str:
+    """
+    Linked-view document for the Cost page, built once per data version.
+    """
+    return _crossfilter_html(DATA_VERSION)
+
 
 # ---------------------------------------------------------------
-# 4. FUNCTIONALITY FOR EACH PAGE BASED ON MENU
+# 5. FUNCTIONALITY FOR EACH PAGE BASED ON MENU
 # ---------------------------------------------------------------
 
-# 4.1 "Changing Borders" Page
+# 5.1 "Changing Borders" Page
+# A fragment: moving the year slider reruns only this page.
+@st.fragment
+@metered("changing_borders")
 def show_changing_borders():
     col_left, col_right = st.columns([2, 1])
 
@@ -373,7 +915,7 @@ def show_changing_borders():
 
         if img_path:
             try:
-                image = Image.open(img_path)
+                image = _lite_image(img_path, 400) if lite_mode() else Image.open(img_path)
                 st.image(
                     image,
                     use_container_width=False,
@@ -395,7 +937,17 @@ def show_changing_borders():
 
     st.markdown("<div style='height: 1rem;'></div>", unsafe_allow_html=True)
 
-# 4.2 "The Population" Page
+# Border maps for lite mode: downscaled to the displayed width and re-encoded as WebP once
+@st.cache_data(show_spinner=False)
+def _lite_image(path: str, width: int) -> bytes:
+    image = Image.open(path).convert("RGB")
+    image.thumbnail((width, width * 4))
+    out = io.BytesIO()
+    image.save(out, format="WEBP", quality=70, method=6)
+    return out.getvalue()
+
+# 5.2 "The Population" Page
+@metered("population")
 def show_population():
     st.markdown("<h1>The <span class='highlight'>Population</span></h1>", unsafe_allow_html=True)
     st.markdown(
@@ -412,49 +964,13 @@ def show_population():
     )
 
     # ------------------------------
-    # 4.2.1 Load Population Dataset
+    # 5.2.1 Load Population Dataset
     # ------------------------------
-    url_palestine = "https://drive.google.com/uc?id=1Kr3mWDhTErT9OlibX_aBaHVtNvRTlZhx"
-    url_israel    = "https://drive.google.com/uc?id=1pfdUGsK4uKs-c7KUQ_zsnKVOkWadu0cw"
-
-    @st.cache_data(show_spinner=False)
-    def load_population_data():
-        df_p = pd.read_csv(url_palestine)
-        df_i = pd.read_csv(url_israel)
-        # Clean string columns (remove ',' and '%')
-        for df in (df_p, df_i):
-            df["Population"]       = pd.to_numeric(df["Population"].str.replace(",", ""), errors="coerce")
-            df["Yearly % Change"]  = pd.to_numeric(df["Yearly % Change"].str.replace("%", ""), errors="coerce")
-            df["Yearly Change"]    = pd.to_numeric(df["Yearly Change"].str.replace(",", ""), errors="coerce")
-            df["Migrants (net)"]   = pd.to_numeric(df["Migrants (net)"].str.replace(",", ""), errors="coerce")
-            df["Urban Pop %"]      = pd.to_numeric(df["Urban Pop %"].str.replace("%", ""), errors="coerce")
-            df["Urban Population"] = pd.to_numeric(df["Urban Population"].str.replace(",", ""), errors="coerce")
-            df["Country's Share of World Pop"] = pd.to_numeric(df["Country's Share of World Pop"].str.replace("%", ""), errors="coerce")
-            df["World Population"] = pd.to_numeric(df["World Population"].str.replace(",", ""), errors="coerce")
-        df_p["Country"] = "Palestine"
-        df_i["Country"] = "Israel"
-        return df_p, df_i
-
-    df_p, df_i = load_population_data()
-
-    # ------------------------------
-    # 4.2.1.5 Population Growth Overview (1955 vs 2025)
-    # ------------------------------
-    # Calculate population growth from 1955 to 2025
-    def calculate_growth(df, country_name):
-        pop_1955 = df[df["Year"] == 1955]["Population"].iloc[0] if len(df[df["Year"] == 1955]) > 0 else None
-        pop_2025 = df[df["Year"] == 2025]["Population"].iloc[0] if len(df[df["Year"] == 2025]) > 0 else None
-        
-        if pop_1955 and pop_2025:
-            growth_percent = ((pop_2025 - pop_1955) / pop_1955) * 100
-            return pop_1955, pop_2025, growth_percent
-        return None, None, None
-
-    # Get growth data
-    pal_1955, pal_2025, pal_growth = calculate_growth(df_p, "Palestine")
-    isr_1955, isr_2025, isr_growth = calculate_growth(df_i, "Israel")
+    # Loaded in the background; the headline cards come from the store summary meanwhile
+    summary = load_summary()
+    population_load = load_in_background(load_population_aggregates)
 
-    # Display overview
+    # Overview card styles
     st.markdown(
         """
         <style>
@@ -485,7 +1001,97 @@ def show_population():
         unsafe_allow_html=True
     )
 
-    st.markdown("<h3>Population Growth Overview (1955 - 2025)</h3>", unsafe_allow_html=True)
+    overview = st.empty()
+    with overview.container():
+        if "population" in summary:
+            (year_from, year_to), by_country = summary["population"]["years"], summary["population"]["by_country"]
+            show_growth_cards(year_from, year_to, by_country["Palestine"], by_country["Israel"])
+        else:
+            show_placeholder(200)
+
+    st.markdown("---")
+
+    # ------------------------------
+    # 5.2.2 Chart 1: Population Trend (Line Chart)
+    # ------------------------------
+    st.markdown("<h3>Yearly Overview</h3>", unsafe_allow_html=True)
+    trend = st.empty()
+    with trend.container():
+        show_placeholder(450)
+    st.caption("Years between the published figures are interpolated; dashed segments are projections.")
+
+    # ------------------------------
+    # 5.2.3 Chart 2: Yearly Growth Rate (Separate Line Charts)
+    # ------------------------------
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("<h3>Growth Rate Palestine (%)</h3>", unsafe_allow_html=True)
+        grow_p = st.empty()
+        with grow_p.container():
+            show_placeholder(450)
+    with col2:
+        st.markdown("<h3>Growth Rate Israel (%)</h3>", unsafe_allow_html=True)
+        grow_i = st.empty()
+        with grow_i.container():
+            show_placeholder(450)
+
+    # Dense annual (country, year) matrices, rows in COUNTRIES order (see projection.py);
+    # solid lines where interpolated from published figures, dashed where projected
+    population = population_load.result()
+
+    with overview.container():
+        show_growth_overview(population)
+
+    with trend.container():
+        show_chart(population_trend_figure(population), "population_trend")
+    with grow_p.container():
+        show_chart(population_growth_figure(population, "Palestine"), "population_growth_palestine")
+    with grow_i.container():
+        show_chart(population_growth_figure(population, "Israel"), "population_growth_israel")
+
+
+# 5.2.1.5 Population Growth Overview (default COMPARE_YEARS, 1955 vs 2025)
+# A fragment: moving the year slider reruns only this section, not the page.
+@st.fragment
+@metered("population.growth_overview")
+def show_growth_overview(population):
+    dense_years    = np.asarray(population["population.dense.years"])
+    dense_value    = np.asarray(population["population.dense.value"])
+    PAL, ISR = COUNTRIES.index("Palestine"), COUNTRIES.index("Israel")
+
+    # Any two years within the published range of both countries can be compared
+    comparable_years, (default_from, default_to) = compare_year_options(population)
+
+    year_from, year_to = st.select_slider(
+        label="Compare years:",
+        options=comparable_years,
+        value=(default_from, default_to),
+        key="population_compare_years"
+    )
+    # O(1) lookups in the dense matrix
+    show_growth_cards(
+        year_from, year_to,
+        (value_at(dense_years, dense_value, PAL, year_from), value_at(dense_years, dense_value, PAL, year_to)),
+        (value_at(dense_years, dense_value, ISR, year_from), value_at(dense_years, dense_value, ISR, year_to)),
+    )
+
+
+# Growth cards for one pair of years; also drawn from the store summary while the data loads
+def show_growth_cards(year_from, year_to, palestine, israel):
+    st.markdown(f"<h3>Population Growth Overview ({year_from} - {year_to})</h3>", unsafe_allow_html=True)
+
+    # Calculate population growth between the two years from (population in year_from, in year_to)
+    def calculate_growth(populations):
+        pop_from, pop_to = populations
+
+        if pop_from and pop_to:
+            growth_percent = ((pop_to - pop_from) / pop_from) * 100
+            return pop_from, pop_to, growth_percent
+        return None, None, None
+
+    # Get growth data
+    pal_from, pal_to, pal_growth = calculate_growth(palestine)
+    isr_from, isr_to, isr_growth = calculate_growth(israel)
     
     overview_col1, overview_col2, overview_col3 = st.columns([1,1,1])
     
@@ -496,9 +1102,9 @@ def show_population():
                 f"""
                 <div class="growth-overview">
                     <h3 class="growth-subtitle" style="color:{COLOR_WHITE};">Average Growth</h3>
-                    <div class="growth-number" style="color:{COLOR_ACCENT};">+{total_growth:.1f}%</div>
+                    <div class="growth-number" style="color:{COLOR_ACCENT};">{total_growth:+.1f}%</div>
                     <p class="growth-description" style="color:{COLOR_WHITE};">
-                        Combined regional population growth over 70 years
+                        Combined regional population growth over {year_to - year_from} years
                     </p>
                 </div>
                 """,
@@ -518,7 +1124,7 @@ def show_population():
                         {growth_arrow} {pal_growth:+.1f}%
                     </div>
                     <p class="growth-description" style="color:{COLOR_WHITE};">
-                        From {pal_1955:,.0f} to {pal_2025:,.0f} people
+                        From {pal_from:,.0f} to {pal_to:,.0f} people
                     </p>
                 </div>
                 """,
@@ -538,124 +1144,16 @@ def show_population():
                         {growth_arrow} {isr_growth:+.1f}%
                     </div>
                     <p class="growth-description" style="color:{COLOR_WHITE};">
-                        From {isr_1955:,.0f} to {isr_2025:,.0f} people
+                        From {isr_from:,.0f} to {isr_to:,.0f} people
                     </p>
                 </div>
                 """,
                 unsafe_allow_html=True
             )
 
-    st.markdown("---")
-
-    # Combine both dataframes for trend chart
-    population_combined = pd.concat([
-        df_p[["Year", "Population", "Country"]],
-        df_i[["Year", "Population", "Country"]]
-    ], ignore_index=True)
 
-    # ------------------------------
-    # 4.2.2 Chart 1: Population Trend (Line Chart)
-    # ------------------------------
-    st.markdown("<h3>Yearly Overview</h3>", unsafe_allow_html=True)
-
-    fig_trend = px.line(
-        population_combined,
-        x="Year",
-        y="Population",
-        color="Country",
-        color_discrete_map={"Palestine": COLOR_ACCENT, "Israel": COLOR_PRIMARY},
-        markers=True,
-        labels={"Population": "Population", "Year": "Year"},
-    )
-    fig_trend.update_layout(
-        plot_bgcolor="rgba(255,255,255,1)",
-        paper_bgcolor="rgba(255,255,255,1)",
-        font=dict(color="#000000"),
-        legend=dict(
-            title="", 
-            font=dict(color="#000000"),
-            bgcolor="rgba(255,255,255,1)"
-        ),
-        xaxis=dict(
-            title=dict(text="Year", font=dict(size=14, color="#000000")),
-            showgrid=True, 
-            gridcolor="rgba(0,0,0,0.1)", 
-            tickfont=dict(color="#000000")
-        ),
-        yaxis=dict(
-            title=dict(text="Population", font=dict(size=14, color="#000000")),
-            showgrid=True, 
-            gridcolor="rgba(0,0,0,0.1)", 
-            tickfont=dict(color="#000000")
-        ),
-    )
-    st.plotly_chart(fig_trend, use_container_width=True)
-
-    # ------------------------------
-    # 4.2.3 Chart 2: Yearly Growth Rate (Separate Line Charts)
-    # ------------------------------
-    col1, col2 = st.columns(2)
-
-    with col1:
-        st.markdown("<h3>Growth Rate Palestine (%)</h3>", unsafe_allow_html=True)
-        fig_grow_p = px.line(
-            df_p,
-            x="Year",
-            y="Yearly % Change",
-            markers=True,
-            color_discrete_sequence=[COLOR_ACCENT],
-            labels={"Yearly % Change": "Growth Rate (%)", "Year": "Year"},
-        )
-        fig_grow_p.update_layout(
-            plot_bgcolor="rgba(255,255,255,1)",
-            paper_bgcolor="rgba(255,255,255,1)",
-            font=dict(color="#000000"),
-            xaxis=dict(
-                title=dict(text="Year", font=dict(size=14, color="#000000")),
-                showgrid=True, 
-                gridcolor="rgba(0,0,0,0.1)", 
-                tickfont=dict(color="#000000")
-            ),
-            yaxis=dict(
-                title=dict(text="Growth Rate (%)", font=dict(size=14, color="#000000")),
-                showgrid=True, 
-                gridcolor="rgba(0,0,0,0.1)", 
-                tickfont=dict(color="#000000")
-            ),
-        )
-        st.plotly_chart(fig_grow_p, use_container_width=True)
-
-    with col2:
-        st.markdown("<h3>Growth Rate Israel (%)</h3>", unsafe_allow_html=True)
-        fig_grow_i = px.line(
-            df_i,
-            x="Year",
-            y="Yearly % Change",
-            markers=True,
-            color_discrete_sequence=[COLOR_PRIMARY],
-            labels={"Yearly % Change": "Growth Rate (%)", "Year": "Year"},
-        )
-        fig_grow_i.update_layout(
-            plot_bgcolor="rgba(255,255,255,1)",
-            paper_bgcolor="rgba(255,255,255,1)",
-            font=dict(color="#000000"),
-            xaxis=dict(
-                title=dict(text="Year", font=dict(size=14, color="#000000")),
-                showgrid=True, 
-                gridcolor="rgba(0,0,0,0.1)", 
-                tickfont=dict(color="#000000")
-            ),
-            yaxis=dict(
-                title=dict(text="Growth Rate (%)", font=dict(size=14, color="#000000")),
-                showgrid=True, 
-                gridcolor="rgba(0,0,0,0.1)", 
-                tickfont=dict(color="#000000")
-            ),
-        )
-        st.plotly_chart(fig_grow_i, use_container_width=True)
-
-
-# 4.3 "The Cost" Page
+# 5.3 "The Cost" Page
+@metered("cost")
 def show_cost():
     st.markdown("<h1>The <span class='highlight'>Cost</span></h1>", unsafe_allow_html=True)
     st.markdown(
@@ -673,40 +1171,92 @@ def show_cost():
     )
 
     # -----------------------------------
-    # 4.3.1 Load death/casualties dataset
+    # 5.3.1 Load death/casualties dataset
     # -----------------------------------
-    url_body_complete = "https://drive.google.com/uc?id=1wwXqjPVl2Uv81Xs8XANO2AhViMnVPcbD"  # dataset with gender, date, age, citizenship
-    url_body_simple   = "https://drive.google.com/uc?id=1rCjmp3-wjvqD7a0TmorOUDXv1cqnpczC"  # dataset without gender
-    @st.cache_data(show_spinner=False)
-    def load_death_data():
-        df_full = pd.read_csv(url_body_complete, encoding="windows-1252")
-        df_simple = pd.read_csv(url_body_simple)
-        # Convert Date of Death to datetime
-        df_full["Date of death"] = pd.to_datetime(df_full["Date of death"], errors="coerce")
-        df_full = df_full.dropna(subset=["Date of death"])
-        # Convert Age column to int
-        df_full["Age"] = pd.to_numeric(df_full["Age"], errors="coerce").fillna(0).astype(int)
-        return df_full, df_simple
-
-    df_full, df_simple = load_death_data()
+    # The count cubes and the query builder's database load in the background, so each
+    # section below appears as soon as its own data is ready
+    summary = load_summary()
+    cost_load = load_in_background(load_cost_aggregates)
+    db_load   = load_in_background(load_casualty_db)
 
     # -----------------------------
-    # 4.3.2 Death Overview (2000–2021)
+    # 5.3.2 Death Overview (2000–2021)
     # -----------------------------
-    df = df_full.copy()
-    df["Year"] = df["Date of death"].dt.year
-    df_filtered = df[df["Year"].between(2000, 2021)]
+    headline = st.empty()
+    with headline.container():
+        if "deaths" in summary:
+            show_death_overview(summary["deaths"])
+        else:
+            show_placeholder(150)
+
+    st.markdown("---")
+
+    # ---------------------------------------
+    # 5.3.2.5 Linked view toggle
+    # ---------------------------------------
+    # In the linked view the charts are drawn in the browser from the compact cube,
+    # and brushing years on the line chart re-filters the rest without a rerun.
+    linked = not lite_mode() and st.toggle(
+        "Linked view: drag across the yearly chart to filter the other charts",
+        key="cost_linked_view"
+    )
+    charts = st.empty()
+    with charts.container():
+        show_placeholder(450)
+
+    st.markdown("***")
+
+    # -----------------------------------
+    # 5.3.7 Map of Deaths by District
+    # -----------------------------------
+    st.markdown("<h3>Where Lives Were Lost</h3>", unsafe_allow_html=True)
+    casualty_map = st.empty()
+    with casualty_map.container():
+        show_placeholder(500)
 
-    death_counts = df_filtered["Citizenship"].value_counts()
-    palestinian_deaths = int(death_counts.get("Palestinian", 0))
-    israeli_deaths     = int(death_counts.get("Israeli", 0))
+    st.markdown("***")
+
+    # -----------------------------------
+    # 5.3.8 Explore the Data (query builder)
+    # -----------------------------------
+    st.markdown("<h3>Explore the Data</h3>", unsafe_allow_html=True)
+    explorer = st.empty()
+    with explorer.container():
+        show_placeholder(300)
+
+    # Fill the sections in whichever order their data arrives
+    for load in concurrent.futures.as_completed([cost_load, db_load]):
+        if load is db_load:
+            db_load.result()
+            with explorer.container():
+                show_casualty_explorer()
+            continue
+
+        cost = cost_load.result()
+        years_window, deaths_window, in_window = cost_window(cost)   # deaths: (side, year, month)
+
+        with headline.container():
+            show_death_overview(build_summary(cost)["deaths"])
+        with charts.container():
+            if linked:
+                components.html(load_crossfilter_html(), height=1450, scrolling=False)
+            else:
+                show_cost_charts(cost, years_window, deaths_window, in_window)
+        with casualty_map.container():
+            show_casualty_map(cost)
+
+
+# 5.3.2 Headline death counts, from data.build_summary (the store's copy while the cubes load)
+def show_death_overview(deaths):
+    palestinian_deaths = deaths["by_side"]["Palestinian"]
+    israeli_deaths     = deaths["by_side"]["Israeli"]
     total_deaths       = palestinian_deaths + israeli_deaths
 
     overview_col1, overview_col2, overview_col3 = st.columns([1,1,1])
     with overview_col1:
         st.markdown(f"<h2 style='color:{COLOR_WHITE};'>Over</h2>", unsafe_allow_html=True)
         st.markdown(f"<h1 style='font-size:2.5rem; color:{COLOR_ACCENT}; margin-top:-1rem;'>{total_deaths:,}</h1>", unsafe_allow_html=True)
-        st.markdown(f"<p style='color:{COLOR_WHITE}; font-size:0.9rem;'>lives lost across all sides since 2000.</p>", unsafe_allow_html=True)
+        st.markdown(f"<p style='color:{COLOR_WHITE}; font-size:0.9rem;'>lives lost across all sides since {deaths['window'][0]}.</p>", unsafe_allow_html=True)
     with overview_col2:
         st.markdown(f"<h3 style='color:{COLOR_WHITE};'><span style='color:{COLOR_ACCENT};'>Palestinian</span> lives lost</h3>", unsafe_allow_html=True)
         st.markdown(f"<h2 style='color:{COLOR_ACCENT};'>{palestinian_deaths:,}</h2>", unsafe_allow_html=True)
@@ -714,234 +1264,225 @@ def show_cost():
         st.markdown(f"<h3 style='color:{COLOR_WHITE};'><span style='color:{COLOR_ACCENT}'>Israeli</span> lives lost</h3>", unsafe_allow_html=True)
         st.markdown(f"<h2 style='color:{COLOR_ACCENT};'>{israeli_deaths:,}</h2>", unsafe_allow_html=True)
 
-    st.markdown("---")
+
+# 5.3.3 – 5.3.6 Server-rendered Cost charts
+def show_cost_charts(cost, years_window, deaths_window, in_window):
+    ISR, PAL = SIDES.index("Israeli"), SIDES.index("Palestinian")
 
     # ---------------------------------------
-    # 4.3.3 Line Chart Deaths per Year (2000–2021)
+    # 5.3.3 Line Chart Deaths per Year (2000–2021)
     # ---------------------------------------
     st.markdown("<h3>Deaths per Year (2000–2021)</h3>", unsafe_allow_html=True)
-    death_counts_year = df_filtered.groupby(["Citizenship", "Year"]).size().reset_index(name="Deaths")
-
-    death_israeli = death_counts_year[death_counts_year["Citizenship"] == "Israeli"]
-    death_palest = death_counts_year[death_counts_year["Citizenship"] == "Palestinian"]
-
-    fig_line = go.Figure()
-    fig_line.add_trace(go.Scatter(
-        x=death_palest["Year"], 
-        y=death_palest["Deaths"],
-        mode="lines+markers",
-        name="Palestinian",
-        line=dict(color=COLOR_ACCENT, width=2.5),
-        marker=dict(size=6)
-    ))
-    fig_line.add_trace(go.Scatter(
-        x=death_israeli["Year"],
-        y=death_israeli["Deaths"],
-        mode="lines+markers",
-        name="Israeli",
-        line=dict(color=COLOR_PRIMARY, width=2.5),
-        marker=dict(size=6)
-    ))
-    fig_line.update_layout(
-        plot_bgcolor="rgba(255,255,255,1)",
-        paper_bgcolor="rgba(255,255,255,1)",
-        font=dict(color="#000000"),
-        xaxis=dict(
-            title=dict(text="Year", font=dict(size=14, color="#000000")),
-            showgrid=True, 
-            gridcolor="rgba(0,0,0,0.1)", 
-            tickfont=dict(color="#000000")
-        ),
-        yaxis=dict(
-            title=dict(text="Number of Deaths", font=dict(size=14, color="#000000")),
-            showgrid=True, 
-            gridcolor="rgba(0,0,0,0.1)", 
-            tickfont=dict(color="#000000")
-        ),
-        legend=dict(title="", font=dict(color="#000000"), bgcolor="rgba(255,255,255,1)"),
-    )
-    st.plotly_chart(fig_line, use_container_width=True)
+    show_deaths_per_year(years_window, deaths_window, in_window)
 
     st.markdown("***")
 
     # -----------------------------------------------------------
-    # 4.3.4 Heatmap Deaths per Month × Year (Date 2000–2021)
+    # 5.3.4 Heatmap Deaths per Month × Year (Date 2000–2021)
     # -----------------------------------------------------------
     st.markdown("<h3>Monthly Cost (Heatmap per Month & Year)</h3>", unsafe_allow_html=True)
 
-    # Create custom colormap for heatmap
-    custom_cmap = LinearSegmentedColormap.from_list("custom", ['#FFFFFF', COLOR_ACCENT, COLOR_PRIMARY])
-
-    # Pivot table for each group
-    def prepare_heatmap(df_group, title_group):
-        pivot = df_group.groupby([df_group["Date of death"].dt.month, df_group["Date of death"].dt.year]) \
-                        .size().unstack(fill_value=0)
-        # Change month number index to month names
-        month_names = ['Jan','Feb','Mar','Apr','May','Jun','Jul','Aug','Sep','Oct','Nov','Dec']
-        pivot.index = [month_names[m-1] for m in pivot.index]
-        return pivot
-
-    israeli_df  = df_filtered[df_filtered["Citizenship"] == "Israeli"]
-    palestine_df= df_filtered[df_filtered["Citizenship"] == "Palestinian"]
-
-    heat_iso  = prepare_heatmap(israeli_df, "Israeli")
-    heat_pale = prepare_heatmap(palestine_df, "Palestinian")
-
     col_h1, col_h2 = st.columns(2)
     with col_h1:
         st.markdown("<h4 style='color: " + COLOR_ACCENT + ";'>Israeli Deaths per Month & Year</h4>", unsafe_allow_html=True)
-        fig_iso_heat = px.imshow(
-            heat_iso,
-            aspect="auto",
-            color_continuous_scale=["#FFFFFF", COLOR_ACCENT, COLOR_PRIMARY],
-            labels=dict(x="Year", y="Month", color="Number of Deaths"),
-        )
-        fig_iso_heat.update_layout(
-            plot_bgcolor="rgba(255,255,255,1)",
-            paper_bgcolor="rgba(255,255,255,1)",
-            xaxis=dict(tickfont=dict(color="#000000")),
-            yaxis=dict(tickfont=dict(color="#000000")),
-            font=dict(color="#000000"),
-            coloraxis_showscale=True,
-            margin=dict(t=20, b=20, l=20, r=20)
-        )
-        st.plotly_chart(fig_iso_heat, use_container_width=True)
+        show_chart(cost_heatmap_figure(years_window, deaths_window[ISR]), "cost_heatmap_israeli")
 
     with col_h2:
         st.markdown("<h4 style='color: " + COLOR_ACCENT + ";'>Palestinian Deaths per Month & Year</h4>", unsafe_allow_html=True)
-        fig_pale_heat = px.imshow(
-            heat_pale,
-            aspect="auto",
-            color_continuous_scale=["#FFFFFF", COLOR_ACCENT, COLOR_PRIMARY],
-            labels=dict(x="Year", y="Month", color="Number of Deaths"),
-        )
-        fig_pale_heat.update_layout(
-            plot_bgcolor="rgba(255,255,255,1)",
-            paper_bgcolor="rgba(255,255,255,1)",
-            xaxis=dict(tickfont=dict(color="#000000")),
-            yaxis=dict(tickfont=dict(color="#000000")),
-            font=dict(color="#000000"),
-            coloraxis_showscale=True,
-            margin=dict(t=20, b=20, l=20, r=20)
-        )
-        st.plotly_chart(fig_pale_heat, use_container_width=True)
+        show_chart(cost_heatmap_figure(years_window, deaths_window[PAL]), "cost_heatmap_palestinian")
 
     st.markdown("***")
 
     # ----------------------------------
-    # 4.3.5 Pie Chart Deaths by Gender
+    # 5.3.5 Pie Chart Deaths by Gender
     # ----------------------------------
     st.markdown("<h3>Deaths by Gender</h3>", unsafe_allow_html=True)
 
-    # Only valid gender F/M
-    df_gender = df_full[df_full["Gender"].isin(["F","M"])].copy()
-    df_gender["Gender Label"] = df_gender["Gender"].map({"F":"Female","M":"Male"})
-
-    iso_gender  = df_gender[df_gender["Citizenship"] == "Israeli"]["Gender Label"].value_counts()
-    pale_gender = df_gender[df_gender["Citizenship"] == "Palestinian"]["Gender Label"].value_counts()
+    # Only valid gender F/M, all years; largest slice first (as value_counts ordered it)
+    gender_totals = np.asarray(cost["cost.gender"]).sum(axis=1)   # (side, gender)
 
     col_g1, col_g2 = st.columns(2)
     
     with col_g1:
         st.markdown("<h4 style='color: " + COLOR_ACCENT + ";'>Israeli Deaths by Gender</h4>", unsafe_allow_html=True)
-        fig_iso_gender = go.Figure(data=[go.Pie(
-            labels=iso_gender.index,
-            values=iso_gender.values,
-            marker_colors=[COLOR_PRIMARY, COLOR_ACCENT],
-            hole=0.4,
-            textinfo="percent+label"
-        )])
-        fig_iso_gender.update_layout(
-            plot_bgcolor="rgba(255,255,255,1)",
-            paper_bgcolor="rgba(255,255,255,1)",
-            font=dict(color="#000000"),
-            legend=dict(font=dict(color="#000000")),
-            margin=dict(t=20, b=20, l=20, r=20),
-            showlegend=True
-        )
-        st.plotly_chart(fig_iso_gender, use_container_width=True)
+        show_chart(cost_gender_figure(gender_totals[ISR]), "cost_gender_israeli")
     
     with col_g2:
         st.markdown("<h4 style='color: " + COLOR_ACCENT + ";'>Palestinian Deaths by Gender</h4>", unsafe_allow_html=True)
-        fig_pale_gender = go.Figure(data=[go.Pie(
-            labels=pale_gender.index,
-            values=pale_gender.values,
-            marker_colors=[COLOR_PRIMARY, COLOR_ACCENT],
-            hole=0.4,
-            textinfo="percent+label"
-        )])
-        fig_pale_gender.update_layout(
-            plot_bgcolor="rgba(255,255,255,1)",
-            paper_bgcolor="rgba(255,255,255,1)",
-            font=dict(color="#000000"),
-            legend=dict(font=dict(color="#000000")),
-            margin=dict(t=20, b=20, l=20, r=20),
-            showlegend=True
-        )
-        st.plotly_chart(fig_pale_gender, use_container_width=True)
+        show_chart(cost_gender_figure(gender_totals[PAL]), "cost_gender_palestinian")
 
     st.markdown("***")
 
     # -----------------------------------
-    # 4.3.6 Bar Chart Deaths by Age Group
+    # 5.3.6 Bar Chart Deaths by Age Group
     # -----------------------------------
     st.markdown("<h3>Deaths by Age Group & Gender</h3>", unsafe_allow_html=True)
+    show_age_breakdown(cost)
 
-    # Prepare data: age-group + gender for each side
-    valid_df = df_full[df_full["Gender"].isin(["F","M"]) & (df_full["Age"] > 0)].copy()
-    age_bins = [0, 17, 30, 45, 60, 75, 120]
-    age_labels = ["0-17","18-30","31-45","46-60","61-75","76+"]
-    valid_df["Age Group"] = pd.cut(valid_df["Age"], bins=age_bins, labels=age_labels)
-    valid_df["Gender Label"] = valid_df["Gender"].map({"F":"Female","M":"Male"})
-
-    def plot_age_bar(df_group, title_group):
-        grouped = df_group.groupby(["Age Group","Gender Label"]).size().unstack(fill_value=0)
-        # Create new DataFrame for Plotly
-        df_plot = grouped.reset_index().melt(id_vars="Age Group", value_vars=["Female","Male"], var_name="Gender", value_name="Count")
-        fig = px.bar(
-            df_plot,
-            x="Age Group",
-            y="Count",
-            color="Gender",
-            barmode="group",
-            color_discrete_map={"Female": COLOR_ACCENT, "Male": COLOR_PRIMARY},
-            labels={"Count":"Number of Deaths", "Age Group":"Age Group", "Gender":"Gender"}
-        )
-        fig.update_layout(
-            plot_bgcolor="rgba(255,255,255,1)",
-            paper_bgcolor="rgba(255,255,255,1)",
-            font=dict(color="#000000"),
-            xaxis=dict(
-                title=dict(text="Age Group", font=dict(size=14, color="#000000")),
-                tickfont=dict(color="#000000")
-            ),
-            yaxis=dict(
-                title=dict(text="Number of Deaths", font=dict(size=14, color="#000000")),
-                tickfont=dict(color="#000000")
-            ),
-            legend=dict(title="", font=dict(color="#000000")),
-            margin=dict(t=40, b=20, l=20, r=20),
-            showlegend=True
-        )
-        return fig
 
-    iso_age  = valid_df[valid_df["Citizenship"] == "Israeli"]
-    pale_age = valid_df[valid_df["Citizenship"] == "Palestinian"]
+# Age brackets offered on the Cost page, as the first age of each bracket
+AGE_BRACKET_PRESETS = {
+    "Standard groups": AGE_STARTS,
+    "5-year": list(range(0, 81, 5)),
+    "10-year": list(range(0, 81, 10)),
+    "Single years": list(range(0, 91)),
+    "Custom": None,
+}
 
-    fig_age_iso  = plot_age_bar(iso_age, "Israeli Deaths by Age Group & Gender")
-    fig_age_pale = plot_age_bar(pale_age, "Palestinian Deaths by Age Group & Gender")
 
+# 5.3.6 Age breakdown, as a fragment. Brackets are re-summed from the single-year
+# histogram (data.rebin_ages), so changing them never touches row-level data.
+@st.fragment
+@metered("cost.age_breakdown")
+def show_age_breakdown(cost):
+    ISR, PAL = SIDES.index("Israeli"), SIDES.index("Palestinian")
+    col_b, col_v = st.columns([3, 2])
+    with col_b:
+        preset = st.radio("Age brackets", list(AGE_BRACKET_PRESETS), horizontal=True, key="cost_age_brackets")
+    with col_v:
+        view = st.radio("View", ("Bars by gender", "Age pyramid"), horizontal=True, key="cost_age_view")
+
+    starts = AGE_BRACKET_PRESETS[preset]
+    if starts is None:
+        text = st.text_input(
+            "First age of each bracket (comma-separated)",
+            value=", ".join(map(str, AGE_STARTS)),
+            key="cost_age_custom",
+        )
+    try:
+        if starts is None:
+            starts = sorted({int(value) for value in text.replace(";", ",").split(",") if value.strip()})
+        # (side, age bracket, gender) over all years, from cumulative-sum differences
+        age_totals = rebin_ages(np.asarray(cost["cost.age_years"]).sum(axis=1), starts, axis=1)
+    except ValueError:
+        st.warning(f"Enter whole ages between 0 and {AGE_MAX}, e.g. 0, 18, 65")
+        return
+    labels = age_bracket_labels(starts)
+
+    plot = age_pyramid_figure if view == "Age pyramid" else age_bar_figure
+    kind = "pyramid" if view == "Age pyramid" else "age"
     col_a1, col_a2 = st.columns(2)
     with col_a1:
         st.markdown("<h4 style='color: " + COLOR_ACCENT + ";'>Israeli Deaths by Age Group & Gender</h4>", unsafe_allow_html=True)
-        st.plotly_chart(fig_age_iso, use_container_width=True)
+        show_chart(plot(labels, age_totals[ISR]), f"cost_{kind}_israeli")
     with col_a2:
         st.markdown("<h4 style='color: " + COLOR_ACCENT + ";'>Palestinian Deaths by Age Group & Gender</h4>", unsafe_allow_html=True)
-        st.plotly_chart(fig_age_pale, use_container_width=True)
+        show_chart(plot(labels, age_totals[PAL]), f"cost_{kind}_palestinian")
+
+    unknown = np.asarray(cost["cost.deaths"]).sum(axis=(1, 2)) - np.asarray(cost["cost.age"]).sum(axis=(1, 2, 3))
+    st.caption(
+        f"Not shown: {unknown[ISR]:,} Israeli and {unknown[PAL]:,} Palestinian deaths with unknown age or gender "
+        "(see the data quality report on the Data Sources page)."
+    )
+
+
+# 5.3.3 Deaths per Year, as a fragment: the scale toggle reruns only this chart
+@st.fragment
+@metered("cost.deaths_per_year")
+def show_deaths_per_year(years_window, deaths_window, in_window):
+    scale = st.radio(
+        "Scale",
+        DEATHS_SCALES,
+        horizontal=True,
+        label_visibility="collapsed",
+        key="deaths_per_year_scale"
+    )
+    if scale == DEATHS_SCALES[0]:
+        death_counts_year = deaths_window.sum(axis=2)   # (side, year)
+    else:
+        # Precomputed and year-aligned with cost.years, so this is just a slice
+        death_counts_year = np.asarray(load_per_capita_aggregates()["percapita.rate"])[:, in_window]
+
+    show_chart(deaths_per_year_figure(years_window, death_counts_year, scale), "cost_deaths_per_year")
+
+
+# 5.3.7 Map of deaths per gazetteer bin, as a fragment. The (side, year, bin) cube is
+# built with the other cost cubes, so the year slider only slices a cached array.
+@st.fragment
+@metered("cost.map")
+def show_casualty_map(cost):
+    years = np.asarray(cost["cost.years"])
+    district = np.asarray(cost["cost.district"])   # (side, year, bin)
+
+    choice = st.select_slider(
+        "Year",
+        options=["All years", *years.tolist()],
+        value="All years",
+        key="cost_map_year",
+    )
+    if choice == "All years":
+        counts = district.sum(axis=1)
+        unplaced = int(np.asarray(cost["cost.deaths"]).sum() - counts.sum())
+    else:
+        index = int(choice) - int(years[0])
+        counts = district[:, index, :]
+        unplaced = int(np.asarray(cost["cost.deaths"])[:, index, :].sum() - counts.sum())
+
+    show_chart(casualty_map_figure(counts), "cost_map")
+    st.caption(
+        "Circles sit on district centroids from the bundled gazetteer (region centroids when the district is "
+        f"unknown); circle area is proportional to deaths. {unplaced:,} deaths in this period have no "
+        "location that matches the gazetteer and are not shown."
+    )
 
 
-# 4.4 "Data Sources" Page
+# 5.3.8 Explore the Data (fragment: query widgets rerun only this section)
+@st.fragment
+@metered("cost.explorer")
+def show_casualty_explorer():
+    """
+    Group-by / filter / time-grain builder over the casualty table; aggregation runs in DuckDB.
+    """
+    con = load_casualty_db()
+    fields = query.available_fields(con)
+    first_day, last_day = query.date_range(con)
+
+    col_q1, col_q2, col_q3 = st.columns([1, 1, 2])
+    with col_q1:
+        group_by = st.selectbox("Group by", ["(none)"] + fields, index=1 + fields.index(EXPLORE_GROUP_BY) if EXPLORE_GROUP_BY in fields else 0, key="explore_group_by")
+    with col_q2:
+        grain_label = st.selectbox("Time grain", list(query.TIME_GRAINS), index=list(query.TIME_GRAINS).index(EXPLORE_GRAIN), key="explore_grain")
+    with col_q3:
+        period = st.date_input("Date range", value=(first_day, last_day), min_value=first_day, max_value=last_day, key="explore_dates")
+
+    col_f1, col_f2 = st.columns([1, 2])
+    with col_f1:
+        filter_field = st.selectbox("Filter on", ["(none)"] + fields, key="explore_filter_field")
+    with col_f2:
+        filter_values = []
+        if filter_field != "(none)":
+            filter_values = st.multiselect("Keep values", query.distinct_values(con, filter_field), key="explore_filter_values")
+
+    group_by = None if group_by == "(none)" else group_by
+    grain = query.TIME_GRAINS[grain_label]
+    start, end = period if len(period) == 2 else (period[0], period[0])
+    filters = {filter_field: filter_values} if filter_field != "(none)" and filter_values else None
+
+    started = time.perf_counter()
+    result = query.run_query(con, group_by=group_by, grain=grain, start=start, end=end, filters=filters)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    if result.empty or result["Deaths"].sum() == 0:
+        st.info("No deaths recorded for this selection.")
+        return
+
+    fig_explore = explore_figure(result, group_by, grain)
+    if fig_explore is not None:
+        show_chart(fig_explore, "cost_explore")
+    else:
+        st.markdown(f"<h2 style='color:{COLOR_ACCENT};'>{int(result['Deaths'].sum()):,}</h2>", unsafe_allow_html=True)
+
+    with st.expander(f"Result table ({len(result):,} rows)"):
+        st.dataframe(result, hide_index=True, use_container_width=True)
+    st.caption(f"Answered in {elapsed_ms:.1f} ms")
+
+
+# 5.4 "Data Sources" Page
+@metered("data_sources")
 def show_data_sources():
+    # The quality report may need the store (or a cold build); it loads while the rest renders
+    quality_load = load_in_background(load_quality_report)
+
     st.markdown("<h1>Data <span class='highlight'>Sources</span></h1>", unsafe_allow_html=True)
     st.markdown(
         """
@@ -1021,18 +1562,80 @@ def show_data_sources():
         unsafe_allow_html=True
     )
 
+    # Validation summary of the loaded sources, computed once per build (see validation.py)
+    with st.expander("Data quality report"):
+        quality_report = st.empty()
+        with quality_report.container():
+            show_placeholder(200)
+
+    # CPU and memory per page for this worker process (used to size replicas)
+    with st.expander("Resource usage"):
+        sessions = len(metrics.snapshot(_usage_registry())["sessions"])
+        st.caption(
+            f"Worker RSS {metrics.rss_bytes() / 1e6:,.0f} MB · {sessions} active session(s) · "
+            f"allocation peaks {'traced' if TRACEMALLOC else 'off (set DASHBOARD_TRACEMALLOC=1)'}"
+        )
+        st.dataframe(get_usage_stats(), hide_index=True, use_container_width=True)
+
+    # Loader cache usage for this worker process (used to size worker memory)
+    with st.expander("Cache statistics"):
+        st.caption(f"Data version {DATA_VERSION} · TTL {CACHE_TTL} · up to {CACHE_MAX_ENTRIES} entries per loader")
+        st.dataframe(get_cache_stats(), hide_index=True, use_container_width=True)
+
+    with st.expander("Chart payload sizes"):
+        st.caption("Serialized size of each chart as last sent to a browser by this worker")
+        st.dataframe(get_figure_stats(), hide_index=True, use_container_width=True)
+
+    quality = quality_load.result()
+    with quality_report.container():
+        st.caption(
+            f"{quality['rows_read']:,} casualty rows read, {quality['rows_kept']:,} kept. "
+            "Rows are counted once per check they fail."
+        )
+        st.dataframe(report_frame(quality), hide_index=True, use_container_width=True)
+
 
 # ---------------------------------------------------------------
-# 5. MAIN: Choose function to run based on menu
+# 6. MAIN: Choose function to run based on menu
 # ---------------------------------------------------------------
-if menu == "Changing Borders":
-    show_changing_borders()
-elif menu == "The Population":
-    show_population()
-elif menu == "The Cost":
-    show_cost()
-elif menu == "Data Sources":
-    show_data_sources()
+# Everything from the menu down is one fragment, so a page switch reruns only
+# show_app() and leaves the CSS, background and navbar above untouched. Widgets
+# inside the pages sit in their own nested fragments and rerun only their section.
+@st.fragment
+def show_app():
+    menu = st.radio(
+        "",
+        ("Changing Borders", "The Population", "The Cost", "Data Sources"),
+        horizontal=True,
+        index=0,
+        label_visibility="collapsed",
+        key="main_navigation"
+    )
+    st.toggle(
+        "Lite mode (static charts)",
+        value=_client_prefers_lite(),
+        key="lite_mode",
+        help="Static chart images instead of interactive charts, for phones and slow connections",
+    )
+
+    st.markdown(
+        """
+          </div>
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
+
+    if menu == "Changing Borders":
+        show_changing_borders()
+    elif menu == "The Population":
+        show_population()
+    elif menu == "The Cost":
+        show_cost()
+    elif menu == "Data Sources":
+        show_data_sources()
+
+show_app()
 
 # Add custom footer
 st.markdown(
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+Per-page and per-session resource accounting for capacity planning.
+
+Every page or fragment run is measured with measure_run(): thread CPU time and
+wall time (Streamlit runs each session's script in its own thread), process RSS
+before and after, and, when tracemalloc is on, the peak of traced Python
+allocations during the run. Totals are kept per page and per active session and
+are exported in the Prometheus text format (render_prometheus, serve_metrics) or
+as one log line per run. Work a page hands to a helper thread (see
+measure_background) is charged to the page's CPU time as well.
+
+RSS and tracemalloc are process-wide. With concurrent sessions a run's memory
+figures include the other sessions' allocations, so size workers from a load
+test or from the upper quantiles, not from a single run.
+"""
+import contextlib
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import resource   # POSIX only; without it RSS and process CPU fall back to what os offers
+except ImportError:
+    resource = None
+
+# Sessions idle for longer than this are dropped from the per-session series
+SESSION_IDLE_SECONDS = 30 * 60
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_local = threading.local()
+logger = logging.getLogger(__name__)
+
+
+def new_registry(log_runs: bool = False) -> dict:
+    """
+    Empty, thread-safe store for the counters; one per process.
+    """
+    return {"lock": threading.Lock(), "pages": {}, "sessions": {}, "log_runs": log_runs,
+            "started": time.time()}
+
+
+def rss_bytes() -> int:
+    """
+    Current resident set size of this process (peak RSS where /proc is unavailable,
+    0 where neither /proc nor the resource module is).
+    """
+    try:
+        with open("/proc/self/statm", encoding="ascii") as file:
+            return int(file.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is None:
+        return 0
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux and the BSDs
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def process_cpu_seconds() -> float:
+    """
+    User plus system CPU time of this process.
+    """
+    if resource is None:
+        times = os.times()
+        return times.user + times.system
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def start_tracemalloc(frames: int = 1):
+    """
+    Trace Python allocations from now on. Costs CPU on every allocation, so keep it opt-in.
+    """
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+@contextlib.contextmanager
+def measure_run(registry: dict, page: str, session: str = None):
+    """
+    Measure the enclosed block as one run of `page` for `session`. Nested runs in the same
+    thread (a fragment called from a page) are counted in the outer run only.
+    """
+    if getattr(_local, "active", False):
+        yield
+        return
+    _local.active = True
+    _local.run = (page, session)
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+        traced_before = tracemalloc.get_traced_memory()[0]
+    rss_before = rss_bytes()
+    cpu_before, wall_before = time.thread_time(), time.perf_counter()
+    try:
+        yield
+    finally:
+        cpu = time.thread_time() - cpu_before
+        wall = time.perf_counter() - wall_before
+        rss_after = rss_bytes()
+        alloc_peak = max(0, tracemalloc.get_traced_memory()[1] - traced_before) if tracing else None
+        _local.active = False
+        _local.run = None
+        record_run(registry, page, session, cpu, wall, rss_after, rss_after - rss_before, alloc_peak)
+
+
+def current_run():
+    """
+    (page, session) of the run being measured in this thread, or None.
+    """
+    return getattr(_local, "run", None)
+
+
+@contextlib.contextmanager
+def measure_background(registry: dict, run):
+    """
+    Charge the thread CPU time of the enclosed block, done on a helper thread on behalf of
+    `run` (see current_run), to that page and session without counting another run.
+    """
+    cpu_before = time.thread_time()
+    try:
+        yield
+    finally:
+        if run is not None:
+            add_cpu(registry, *run, time.thread_time() - cpu_before)
+
+
+def _page_entry(registry: dict, page: str) -> dict:
+    return registry["pages"].setdefault(page, {
+        "runs": 0, "cpu": 0.0, "wall": 0.0, "rss_delta_max": 0, "alloc_peak_max": 0})
+
+
+def _session_state(registry: dict, session: str, now: float) -> dict:
+    state = registry["sessions"].setdefault(session, {"runs": 0, "cpu": 0.0, "alloc_peak_max": 0, "first_seen": now})
+    state["last_seen"] = now
+    return state
+
+
+def add_cpu(registry: dict, page: str, session: str, cpu: float):
+    with registry["lock"]:
+        _page_entry(registry, page)["cpu"] += cpu
+        if session is not None:
+            _session_state(registry, session, time.time())["cpu"] += cpu
+
+
+def record_run(registry: dict, page: str, session: str, cpu: float, wall: float,
+               rss: int, rss_delta: int, alloc_peak: int = None):
+    now = time.time()
+    with registry["lock"]:
+        entry = _page_entry(registry, page)
+        entry["runs"] += 1
+        entry["cpu"] += cpu
+        entry["wall"] += wall
+        entry["rss_delta_max"] = max(entry["rss_delta_max"], rss_delta)
+        entry["alloc_peak_max"] = max(entry["alloc_peak_max"], alloc_peak or 0)
+
+        if session is not None:
+            sessions = registry["sessions"]
+            state = _session_state(registry, session, now)
+            state["runs"] += 1
+            state["cpu"] += cpu
+            state["alloc_peak_max"] = max(state["alloc_peak_max"], alloc_peak or 0)
+            for idle in [key for key, value in sessions.items() if now - value["last_seen"] > SESSION_IDLE_SECONDS]:
+                del sessions[idle]
+
+    if registry["log_runs"]:
+        logger.info(
+            "page=%r session=%s cpu_ms=%.1f wall_ms=%.1f rss_mb=%.1f rss_delta_mb=%+.1f alloc_peak_mb=%s",
+            page, (session or "-")[:8], cpu * 1e3, wall * 1e3, rss / 1e6, rss_delta / 1e6,
+            "-" if alloc_peak is None else f"{alloc_peak / 1e6:.1f}",
+        )
+
+
+def snapshot(registry: dict) -> dict:
+    """
+    Copy of the counters, safe to read without holding the lock.
+    """
+    with registry["lock"]:
+        return {
+            "pages": {page: dict(entry) for page, entry in registry["pages"].items()},
+            "sessions": {session: dict(state) for session, state in registry["sessions"].items()},
+        }
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus(registry: dict) -> str:
+    """
+    All counters in the Prometheus text exposition format (version 0.0.4).
+    """
+    data = snapshot(registry)
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            label_text = ",".join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+            lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+    pages = sorted(data["pages"].items())
+    sessions = sorted(data["sessions"].items())
+    metric("dashboard_process_resident_memory_bytes", "gauge", "Resident set size of the worker.",
+           [({}, rss_bytes())])
+    metric("dashboard_process_cpu_seconds_total", "counter", "User and system CPU time of the worker.",
+           [({}, f"{process_cpu_seconds():.6f}")])
+    metric("dashboard_traced_memory_bytes", "gauge", "Python allocations traced by tracemalloc (0 when off).",
+           [({}, tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0)])
+    metric("dashboard_page_runs_total", "counter", "Script runs per page or fragment.",
+           [({"page": page}, entry["runs"]) for page, entry in pages])
+    metric("dashboard_page_cpu_seconds_total", "counter", "Thread CPU time spent rendering each page.",
+           [({"page": page}, f"{entry['cpu']:.6f}") for page, entry in pages])
+    metric("dashboard_page_wall_seconds_total", "counter", "Wall time spent rendering each page.",
+           [({"page": page}, f"{entry['wall']:.6f}") for page, entry in pages])
+    metric("dashboard_page_rss_growth_max_bytes", "gauge", "Largest RSS growth seen during one run of each page.",
+           [({"page": page}, entry["rss_delta_max"]) for page, entry in pages])
+    metric("dashboard_page_alloc_peak_max_bytes", "gauge", "Largest traced allocation peak during one run of each page.",
+           [({"page": page}, entry["alloc_peak_max"]) for page, entry in pages])
+    metric("dashboard_sessions_active", "gauge", f"Sessions with a run in the last {SESSION_IDLE_SECONDS}s.",
+           [({}, len(sessions))])
+    metric("dashboard_session_cpu_seconds", "gauge", "Thread CPU time used by each active session.",
+           [({"session": session[:8]}, f"{state['cpu']:.6f}") for session, state in sessions])
+    metric("dashboard_session_alloc_peak_max_bytes", "gauge", "Largest traced allocation peak of each active session.",
+           [({"session": session[:8]}, state["alloc_peak_max"]) for session, state in sessions])
+    return "\n".join(lines) + "\n"
+
+
+def serve_metrics(registry: dict, port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """
+    Serve render_prometheus() at http://host:port/metrics from a daemon thread.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = render_prometheus(registry).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass   # scrapes every few seconds would flood the worker log
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="dashboard-metrics", daemon=True).start()
+    return server
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+Dense annual population series from the sampled years the sources publish.
+
+Worldometer only lists every 5th year before 2020, so the published points are
+interpolated to one value per year (monotone cubic or log-linear, both in log
+space) and optionally extrapolated past the last published year. Everything
+is vectorised NumPy over the year axis. Once built, looking up or comparing
+any two years is a plain index into the matrix.
+"""
+import numpy as np
+
+INTERPOLATION_METHODS = ("pchip", "log-linear")
+
+# Projected growth rate halves every PROJECTION_HALF_LIFE years (see project_population)
+PROJECTION_HALF_LIFE = 15
+
+
+def _clean_points(years, values):
+    years = np.asarray(years, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    keep = np.isfinite(years) & np.isfinite(values) & (values > 0)
+    order = np.argsort(years[keep])
+    return years[keep][order], values[keep][order]
+
+
+def interpolate_log_linear(x_known, y_known, x):
+    """
+    Constant growth rate between published points (straight lines in log space).
+    """
+    return np.exp(np.interp(x, x_known, np.log(y_known)))
+
+
+def interpolate_pchip(x_known, y_known, x):
+    """
+    Monotone piecewise cubic (Fritsch-Carlson) through the published points in log space.
+    Smooth like a cubic spline, but never overshoots between two samples.
+    """
+    if len(x_known) < 3:
+        return interpolate_log_linear(x_known, y_known, x)
+    log_y = np.log(y_known)
+    h = np.diff(x_known)
+    delta = np.diff(log_y) / h
+
+    # Slopes at the knots: weighted harmonic mean of neighbouring secants, 0 at local extrema
+    slopes = np.empty_like(log_y)
+    slopes[0], slopes[-1] = delta[0], delta[-1]
+    w1 = 2 * h[1:] + h[:-1]
+    w2 = h[1:] + 2 * h[:-1]
+    same_sign = delta[:-1] * delta[1:] > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        harmonic = (w1 + w2) / (w1 / delta[:-1] + w2 / delta[1:])
+    slopes[1:-1] = np.where(same_sign, harmonic, 0.0)
+
+    x = np.asarray(x, dtype=np.float64)
+    seg = np.clip(np.searchsorted(x_known, x, side="right") - 1, 0, len(x_known) - 2)
+    t = (x - x_known[seg]) / h[seg]
+    t2, t3 = t * t, t * t * t
+    log_x = ((2 * t3 - 3 * t2 + 1) * log_y[seg]
+             + (t3 - 2 * t2 + t) * h[seg] * slopes[seg]
+             + (-2 * t3 + 3 * t2) * log_y[seg + 1]
+             + (t3 - t2) * h[seg] * slopes[seg + 1])
+    return np.exp(log_x)
+
+
+def project_population(last_value: float, last_rate: float, n_years: int,
+                       half_life: float = PROJECTION_HALF_LIFE):
+    """
+    Extend a series by n_years. The annual growth rate starts at the last observed rate
+    and decays geometrically towards zero, mimicking the slowing natural increase a
+    cohort-component projection produces without needing age-structured inputs.
+    """
+    steps = np.arange(1, n_years + 1, dtype=np.float64)
+    rates = last_rate * 0.5 ** (steps / half_life)
+    return last_value * np.cumprod(1.0 + rates)
+
+
+def build_dense_series(years, values, first_year: int, last_year: int, method: str = "pchip"):
+    """
+    One value per year from first_year to last_year for a single country.
+    Returns (values, observed) where observed is False for extrapolated years.
+    """
+    if method not in INTERPOLATION_METHODS:
+        raise ValueError(f"Unknown interpolation method: {method}")
+    x_known, y_known = _clean_points(years, values)
+    dense_years = np.arange(first_year, last_year + 1, dtype=np.float64)
+    dense = np.full(len(dense_years), np.nan)
+    if len(x_known) == 0:
+        return dense, np.zeros(len(dense_years), dtype=bool)
+
+    inside = (dense_years >= x_known[0]) & (dense_years <= x_known[-1])
+    interpolate = interpolate_pchip if method == "pchip" else interpolate_log_linear
+    dense[inside] = interpolate(x_known, y_known, dense_years[inside])
+
+    after = dense_years > x_known[-1]
+    if after.any() and len(x_known) >= 2:
+        span = x_known[-1] - x_known[-2]
+        last_rate = (y_known[-1] / y_known[-2]) ** (1.0 / span) - 1.0
+        dense[after] = project_population(y_known[-1], last_rate, int(after.sum()))
+    return dense, inside
+
+
+def build_dense_matrix(series: dict, first_year: int = None, last_year: int = None, method: str = "pchip"):
+    """
+    Dense (country, year) population matrix from {country: (years, values)}.
+
+    Returns a dict with the year axis, the population matrix, the annual % change
+    matrix (NaN in the first year) and a boolean mask of observed (not projected) years.
+    """
+    all_years = np.concatenate([np.asarray(years, dtype=np.float64) for years, _ in series.values()])
+    first_year = int(np.nanmin(all_years)) if first_year is None else first_year
+    last_year = int(np.nanmax(all_years)) if last_year is None else last_year
+
+    rows = [build_dense_series(years, values, first_year, last_year, method) for years, values in series.values()]
+    value = np.vstack([dense for dense, _ in rows])
+    observed = np.vstack([inside for _, inside in rows])
+    change = np.full_like(value, np.nan)
+    change[:, 1:] = (value[:, 1:] / value[:, :-1] - 1.0) * 100.0
+    return {
+        "years": np.arange(first_year, last_year + 1, dtype=np.int32),
+        "value": value,
+        "change": change,
+        "observed": observed,
+    }
+
+
+def value_at(years, matrix, row: int, year: int):
+    """
+    O(1) lookup of one country's value in a dense matrix; None outside the year axis.
+    """
+    index = int(year) - int(years[0])
+    if index < 0 or index >= len(years):
+        return None
+    value = matrix[row, index]
+    return None if np.isnan(value) else float(value)
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+Ad-hoc casualty queries on an embedded DuckDB database.
+
+`casualties` is a view over a Parquet snapshot of the cleaned rows: the one in
+the shared store (see data.write_store) or the app's own when the store is cold
+(see main.load_casualties). Every query is a single GROUP BY pushed down to DuckDB.
+
+One connection is shared by every session of a worker, and a DuckDB connection
+is not thread-safe, so every helper below runs on its own cursor.
+"""
+import os
+import tempfile
+
+import duckdb
+import pandas as pd
+
+DATE_COLUMN = "Date of death"
+
+# Columns offered in the query builder, when present in the source
+GROUP_FIELDS = (
+    "Citizenship",
+    "Gender",
+    "Event location",
+    "Event location - District",
+    "Event location - Region",
+    "Place of residence - District",
+    "Type of injury",
+    "Ammunition",
+    "Killed by",
+    "Took part in the hostilities",
+)
+
+TIME_GRAINS = {"Total": None, "Year": "year", "Quarter": "quarter", "Month": "month"}
+
+# Working memory DuckDB may use while building a snapshot from chunks; it spills to disk past this
+SNAPSHOT_MEMORY_LIMIT = "512MB"
+
+
+def _identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def write_parquet(df: pd.DataFrame, path: str):
+    """
+    Save a frame as a Parquet file (DuckDB writes it, so pyarrow is not needed).
+    """
+    con = duckdb.connect()
+    try:
+        con.register("frame", df)
+        con.execute(f"COPY frame TO {_literal(path)} (FORMAT PARQUET, COMPRESSION ZSTD)")
+    finally:
+        con.close()
+
+
+def write_parquet_chunks(chunks, path: str) -> int:
+    """
+    Save an iterable of frames with the same columns as one Parquet file. Returns the row count.
+
+    Chunks are appended to a scratch on-disk database next to `path`, so memory stays
+    bounded by one chunk plus SNAPSHOT_MEMORY_LIMIT however large the input is.
+    """
+    scratch_dir = tempfile.mkdtemp(prefix="snapshot-", dir=os.path.dirname(os.path.abspath(path)))
+    con = duckdb.connect(os.path.join(scratch_dir, "snapshot.duckdb"))
+    try:
+        con.execute(f"SET memory_limit = {_literal(SNAPSHOT_MEMORY_LIMIT)}")
+        con.execute("SET preserve_insertion_order = false")
+        rows, created = 0, False
+        for chunk in chunks:
+            con.register("chunk", chunk)
+            if created:
+                con.execute("INSERT INTO casualties BY NAME SELECT * FROM chunk")
+            else:
+                con.execute("CREATE TABLE casualties AS SELECT * FROM chunk")
+                created = True
+            con.unregister("chunk")
+            rows += len(chunk)
+        if not created:
+            raise ValueError("No chunks to write")
+        con.execute(f"COPY casualties TO {_literal(path)} (FORMAT PARQUET, COMPRESSION ZSTD)")
+        return rows
+    finally:
+        con.close()
+        for name in os.listdir(scratch_dir):
+            os.remove(os.path.join(scratch_dir, name))
+        os.rmdir(scratch_dir)
+
+
+def parquet_info(path: str):
+    """
+    (row count, column names) of a Parquet file, read from its footer.
+    """
+    con = duckdb.connect()
+    try:
+        rows = con.execute(f"SELECT count(*) FROM read_parquet({_literal(path)})").fetchone()[0]
+        columns = [row[0] for row in con.execute(f"DESCRIBE SELECT * FROM read_parquet({_literal(path)})").fetchall()]
+        return int(rows), columns
+    finally:
+        con.close()
+
+
+def connect(parquet_path: str) -> duckdb.DuckDBPyConnection:
+    """
+    New in-memory database with `casualties` as a view over a Parquet snapshot. The file is
+    read on every query, so replicas share it through the page cache instead of copying it.
+    """
+    con = duckdb.connect(":memory:")
+    con.execute(f"CREATE VIEW casualties AS SELECT * FROM read_parquet({_literal(parquet_path)})")
+    return con
+
+
+def available_fields(con: duckdb.DuckDBPyConnection) -> list:
+    with con.cursor() as cursor:
+        columns = {row[0] for row in cursor.execute("DESCRIBE casualties").fetchall()}
+    return [field for field in GROUP_FIELDS if field in columns]
+
+
+def distinct_values(con: duckdb.DuckDBPyConnection, field: str) -> list:
+    if field not in available_fields(con):
+        raise ValueError(f"Unknown field: {field}")
+    column = _identifier(field)
+    with con.cursor() as cursor:
+        rows = cursor.execute(f"SELECT DISTINCT {column} FROM casualties WHERE {column} IS NOT NULL ORDER BY 1").fetchall()
+    return [row[0] for row in rows]
+
+
+def date_range(con: duckdb.DuckDBPyConnection):
+    column = _identifier(DATE_COLUMN)
+    with con.cursor() as cursor:
+        return cursor.execute(f"SELECT min({column})::DATE, max({column})::DATE FROM casualties").fetchone()
+
+
+def run_query(con: duckdb.DuckDBPyConnection, group_by: str = None, grain: str = None,
+              start=None, end=None, filters: dict = None) -> pd.DataFrame:
+    """
+    Count deaths grouped by an optional field and time grain between two dates (inclusive).
+
+    `filters` maps a field to the list of values to keep. Field names are checked against
+    available_fields(); values, dates and the grain are passed as parameters.
+    Result columns: [Period], [group_by], Deaths.
+    """
+    fields = available_fields(con)
+    for field in [group_by, *(filters or {})]:
+        if field is not None and field not in fields:
+            raise ValueError(f"Unknown field: {field}")
+    if grain not in TIME_GRAINS.values():
+        raise ValueError(f"Unknown time grain: {grain}")
+
+    date_column = _identifier(DATE_COLUMN)
+    select, where, params = [], [], []
+    if grain is not None:
+        select.append(f"date_trunc(?, {date_column})::DATE AS \"Period\"")
+        params.append(grain)
+    if group_by is not None:
+        select.append(_identifier(group_by))
+    select.append("count(*) AS \"Deaths\"")
+
+    if start is not None:
+        where.append(f"{date_column} >= ?")
+        params.append(pd.Timestamp(start))
+    if end is not None:
+        where.append(f"{date_column} < ?")
+        params.append(pd.Timestamp(end) + pd.Timedelta(days=1))
+    for field, values in (filters or {}).items():
+        if values:
+            where.append(f"{_identifier(field)} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+
+    sql = f"SELECT {', '.join(select)} FROM casualties"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    if grain is not None or group_by is not None:
+        sql += " GROUP BY ALL ORDER BY ALL"
+    with con.cursor() as cursor:   # one cursor per call: sessions query from their own threads
+        return cursor.execute(sql, params).df()
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+import pytest
+
+import data
+from check_budgets import fixture_casualties
+from validation import validate_death_data
+
+
+@pytest.mark.parametrize("starts", [data.AGE_STARTS, [0, 5, 10, 50], [0], [3, 40, 41, data.AGE_MAX]])
+def test_rebin_ages_matches_pd_cut(starts):
+    rng = np.random.default_rng(1)
+    ages = rng.integers(0, data.AGE_MAX + 1, 5_000)
+    age_years = np.bincount(ages, minlength=data.AGE_MAX + 1)
+
+    counts = data.rebin_ages(age_years, starts, axis=0)
+
+    bins = list(starts) + [data.AGE_MAX + 1]
+    brackets = pd.cut(ages, bins, right=False, labels=data.age_bracket_labels(starts))
+    expected = pd.Series(brackets).value_counts(sort=False).to_numpy()
+    np.testing.assert_array_equal(counts, expected)
+
+
+@pytest.mark.parametrize("starts", [[], [5, 5], [10, 0], [0, data.AGE_MAX + 1], [-1, 10]])
+def test_rebin_ages_rejects_bad_brackets(starts):
+    with pytest.raises(ValueError):
+        data.rebin_ages(np.zeros(data.AGE_MAX + 1), starts, axis=0)
+
+
+@pytest.fixture(scope="module")
+def casualty_csv(tmp_path_factory):
+    raw = fixture_casualties(rows=3_000)
+    # The last row repeats the first one, so the duplicate only shows up across chunks
+    raw = pd.concat([raw, raw.iloc[[0]]], ignore_index=True)
+    path = tmp_path_factory.mktemp("sources") / "casualties.csv"
+    raw.to_csv(path, index=False, encoding="windows-1252")
+    return str(path), pd.read_csv(path, encoding="windows-1252")
+
+
+@pytest.mark.parametrize("chunk_rows", [250, 1_000, 2_999, 10_000])
+def test_chunked_ingest_matches_whole_table(casualty_csv, chunk_rows):
+    path, raw = casualty_csv
+
+    cost, quality = data.ingest_death_data([(path, "windows-1252")], chunk_rows=chunk_rows)
+
+    expected = data.build_cost_aggregates(data.clean_death_chunk(raw))
+    assert cost.keys() == expected.keys()
+    for name, array in expected.items():
+        np.testing.assert_array_equal(cost[name], array, err_msg=name)
+
+    whole = validate_death_data(raw)
+    assert (quality["rows_read"], quality["rows_kept"]) == (whole["rows_read"], whole["rows_kept"])
+    rows = {check["Check"]: check["Rows"] for check in quality["checks"]}
+    assert rows == {check["Check"]: check["Rows"] for check in whole["checks"]}
+    assert rows["Duplicate name and date"] == 1
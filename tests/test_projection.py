@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from projection import build_dense_matrix, interpolate_pchip
+
+# Published points shaped like the Worldometer tables: every 5th year, then yearly
+YEARS = np.array(list(range(1955, 2020, 5)) + list(range(2020, 2026)), dtype=np.float64)
+
+
+def growing(rate):
+    return 1.0e6 * (1 + rate) ** (YEARS - YEARS[0])
+
+
+def test_pchip_passes_through_published_points():
+    values = growing(0.025) * (1 + 0.01 * np.sin(YEARS))
+    np.testing.assert_allclose(interpolate_pchip(YEARS, values, YEARS), values, rtol=1e-12)
+
+
+@pytest.mark.parametrize("rate", [0.03, -0.01])
+def test_pchip_is_monotone_between_monotone_points(rate):
+    dense = interpolate_pchip(YEARS, growing(rate), np.arange(YEARS[0], YEARS[-1] + 0.25, 0.25))
+    steps = np.diff(dense)
+    assert np.all(steps > 0) if rate > 0 else np.all(steps < 0)
+
+
+def test_pchip_does_not_overshoot_a_plateau():
+    values = np.where(YEARS < 1990, 1.0e6, 2.0e6)
+    dense = interpolate_pchip(YEARS, values, np.arange(YEARS[0], YEARS[-1] + 1))
+    assert dense.min() >= 1.0e6 * (1 - 1e-12) and dense.max() <= 2.0e6 * (1 + 1e-12)
+
+
+def test_dense_matrix_keeps_published_values_and_flags_projection():
+    dense = build_dense_matrix({"A": (YEARS, growing(0.02))}, last_year=2030)
+    published = (YEARS - dense["years"][0]).astype(int)
+    np.testing.assert_allclose(dense["value"][0, published], growing(0.02), rtol=1e-12)
+    assert dense["observed"][0].sum() == YEARS[-1] - YEARS[0] + 1
+    assert not dense["observed"][0, -5:].any()
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+
+import data
+from validation import validate_death_data
+
+
+def test_unknown_codes_match_the_cleaned_values():
+    raw = pd.DataFrame({
+        "Date of death": ["2001-01-01"] * 5,
+        "Age": [20, 30, 40, 50, 60],
+        "Citizenship": ["Palestinian ", " Israeli", "Palestinian", None, "Jordanian"],
+        "Gender": [" M", "F ", "M", "F", None],
+    })
+    report = validate_death_data(raw)
+    rows = {check["Check"]: check["Rows"] for check in report["checks"]}
+
+    cleaned = data.clean_death_chunk(raw)
+    assert rows["Unknown citizenship"] == (~cleaned["Citizenship"].isin(data.SIDES)).sum() == 2
+    assert rows["Unknown gender"] == (~cleaned["Gender"].isin(["F", "M"])).sum() == 1
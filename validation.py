@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+Load-time validation of the source tables and the quality report shown on the
+Data Sources page.
+
+The checks are vectorised pandas expressions over whole columns. They run once
+per snapshot build (python data.py build) or cache refresh, never per session.
+The report is a small JSON-ready dict stored in the build manifest next to
+the arrays it describes. Each row of report["checks"] counts the rows one check
+flagged and says how the cleaning step handled them. Reports of consecutive
+chunks of one table are combined with merge_reports (see data.ingest_death_data).
+"""
+import numpy as np
+import pandas as pd
+
+# Columns every casualty snapshot must have; the pages and the cubes need all of them
+REQUIRED_DEATH_COLUMNS = ("Date of death", "Age", "Citizenship", "Gender")
+REQUIRED_POPULATION_COLUMNS = ("Year", "Population", "Yearly % Change")
+
+# Span the casualty source covers; dates outside it are kept but reported
+DATE_RANGE = ("2000-01-01", "2021-12-31")
+AGE_RANGE  = (0, 120)
+
+CITIZENSHIP_CODES = ("Israeli", "Palestinian")
+GENDER_CODES      = ("F", "M")
+
+REPORT_COLUMNS = ["Dataset", "Check", "Column", "Rows", "Handling", "Examples"]
+MAX_EXAMPLES = 3
+
+
+class DataValidationError(Exception):
+    """A source table cannot be used at all (e.g. a required column is missing)."""
+
+
+def _check(dataset: str, check: str, column: str, mask, handling: str, examples=None) -> dict:
+    return {
+        "Dataset": dataset,
+        "Check": check,
+        "Column": column,
+        "Rows": int(np.count_nonzero(mask)),
+        "Handling": handling,
+        "Examples": list(examples or [])[:MAX_EXAMPLES],
+    }
+
+
+def _top_values(values: pd.Series, mask, n: int = MAX_EXAMPLES) -> list:
+    return values[mask].fillna("(missing)").value_counts().head(n).index.tolist()
+
+
+def require_columns(df: pd.DataFrame, columns, dataset: str):
+    """
+    Raise DataValidationError when the table lacks any of the given columns.
+    """
+    missing = [column for column in columns if column not in df.columns]
+    if missing:
+        raise DataValidationError(f"{dataset}: missing column(s) {', '.join(missing)}")
+
+
+def parse_dates(raw: pd.Series) -> pd.Series:
+    return pd.to_datetime(raw, errors="coerce")
+
+
+def parse_ages(raw: pd.Series) -> pd.Series:
+    """
+    Ages as nullable integers; anything unparsable or outside AGE_RANGE becomes <NA> (unknown).
+    """
+    age = np.trunc(pd.to_numeric(raw, errors="coerce"))
+    age = age.where((age >= AGE_RANGE[0]) & (age <= AGE_RANGE[1]))
+    return age.astype("Int64")
+
+
+def validate_death_data(df_raw: pd.DataFrame, seen_keys: dict = None) -> dict:
+    """
+    Check the raw casualty table (before cleaning) and return the quality report:
+    {"rows_read", "rows_kept", "checks": [...]} with one entry per check in REPORT_COLUMNS.
+
+    When the table arrives in chunks, pass the same `seen_keys` dict with every chunk so
+    duplicates of rows from earlier chunks are found too. It keeps one 8-byte hash per row.
+    """
+    dataset = "Casualties"
+    require_columns(df_raw, REQUIRED_DEATH_COLUMNS, dataset)
+
+    raw_date = df_raw["Date of death"]
+    date = parse_dates(raw_date)
+    missing_date = raw_date.isna()
+    bad_date = ~missing_date & date.isna()
+    outside = date.notna() & ((date < pd.Timestamp(DATE_RANGE[0])) | (date > pd.Timestamp(DATE_RANGE[1])))
+
+    raw_age = pd.to_numeric(df_raw["Age"], errors="coerce")
+    missing_age = df_raw["Age"].isna()
+    bad_age = ~missing_age & raw_age.isna()
+    age_range = raw_age.notna() & ((raw_age < AGE_RANGE[0]) | (raw_age > AGE_RANGE[1]))
+
+    # Compared as clean_death_chunk stores them, so "Palestinian " counts as known here too
+    citizenship = df_raw["Citizenship"].astype("string").str.strip().str.normalize("NFC")
+    unknown_side = ~citizenship.isin(CITIZENSHIP_CODES)
+    gender = df_raw["Gender"].astype("string").str.strip().str.normalize("NFC")
+    unknown_gender = ~gender.isin(GENDER_CODES)
+
+    kept = date.notna()
+    checks = [
+        _check(dataset, "Missing date", "Date of death", missing_date, "Dropped"),
+        _check(dataset, "Unparsable date", "Date of death", bad_date, "Dropped",
+               _top_values(raw_date.astype(str), bad_date)),
+        _check(dataset, f"Date outside {DATE_RANGE[0][:4]}–{DATE_RANGE[1][:4]}", "Date of death", outside,
+               "Kept; outside the Cost page window", sorted(date[outside].dt.year.unique().tolist())),
+        _check(dataset, "Missing age", "Age", kept & missing_age, "Kept as unknown age; not in age charts"),
+        _check(dataset, "Unparsable age", "Age", kept & bad_age, "Kept as unknown age; not in age charts",
+               _top_values(df_raw["Age"].astype(str), kept & bad_age)),
+        _check(dataset, f"Age outside {AGE_RANGE[0]}–{AGE_RANGE[1]}", "Age", kept & age_range,
+               "Kept as unknown age; not in age charts", _top_values(raw_age, kept & age_range)),
+        _check(dataset, "Unknown citizenship", "Citizenship", kept & unknown_side,
+               "Kept; not in per-side charts", _top_values(citizenship, kept & unknown_side)),
+        _check(dataset, "Unknown gender", "Gender", kept & unknown_gender,
+               "Kept; not in gender and age charts", _top_values(gender, kept & unknown_gender)),
+    ]
+    if "Name" in df_raw.columns:
+        keys = pd.DataFrame({"name": df_raw["Name"].astype("string").str.strip().str.casefold(), "date": date})
+        hashes = pd.util.hash_pandas_object(keys, index=False).to_numpy()
+        duplicate = keys.duplicated(keep="first").to_numpy(copy=True)
+        if seen_keys is not None:
+            previous = seen_keys.get("hashes", np.empty(0, dtype=np.uint64))
+            duplicate |= np.isin(hashes, previous)
+            seen_keys["hashes"] = np.union1d(previous, hashes[(kept & df_raw["Name"].notna()).to_numpy()])
+        duplicate = kept & df_raw["Name"].notna() & duplicate
+        checks.append(_check(dataset, "Duplicate name and date", "Name", duplicate,
+                             "Kept; may be distinct people", _top_values(df_raw["Name"], duplicate)))
+
+    return {"rows_read": int(len(df_raw)), "rows_kept": int(np.count_nonzero(kept)), "checks": checks}
+
+
+def validate_population_data(df_p: pd.DataFrame, df_i: pd.DataFrame) -> list:
+    """
+    Checks on the cleaned population tables (see data.read_population_data), as report rows.
+    """
+    checks = []
+    for country, df in (("Palestine", df_p), ("Israel", df_i)):
+        dataset = f"Population ({country})"
+        require_columns(df, REQUIRED_POPULATION_COLUMNS, dataset)
+        population = df["Population"]
+        checks += [
+            _check(dataset, "Missing or unparsable population", "Population", population.isna(),
+                   "Skipped when interpolating"),
+            _check(dataset, "Non-positive population", "Population", population <= 0,
+                   "Skipped when interpolating", _top_values(population, population <= 0)),
+            _check(dataset, "Duplicate year", "Year", df["Year"].duplicated(keep="first"),
+                   "Kept; check the source table", _top_values(df["Year"], df["Year"].duplicated())),
+        ]
+    return checks
+
+
+def merge_reports(total: dict, part: dict) -> dict:
+    """
+    Combine the reports of two chunks of the same table (checks are matched by position).
+    """
+    if total is None:
+        return part
+    checks = []
+    for check, other in zip(total["checks"], part["checks"]):
+        examples = check["Examples"] + [value for value in other["Examples"] if value not in check["Examples"]]
+        checks.append({**check, "Rows": check["Rows"] + other["Rows"], "Examples": examples[:MAX_EXAMPLES]})
+    checks += total["checks"][len(checks):] + part["checks"][len(checks):]
+    return {
+        "rows_read": total["rows_read"] + part["rows_read"],
+        "rows_kept": total["rows_kept"] + part["rows_kept"],
+        "checks": checks,
+    }
+
+
+def report_frame(report: dict) -> pd.DataFrame:
+    """
+    The report's checks as a table, flagged rows first.
+    """
+    checks = pd.DataFrame((report or {}).get("checks", []), columns=REPORT_COLUMNS)
+    checks["Examples"] = checks["Examples"].map(
+        lambda examples: ", ".join(map(str, examples)) if isinstance(examples, list) else examples)
+    return checks.sort_values("Rows", ascending=False, kind="stable").reset_index(drop=True)